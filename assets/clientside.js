@@ -0,0 +1,164 @@
+/*
+ * Clientside region switching for dash_app.py (enabled with DASH_CLIENTSIDE=1).
+ *
+ * The server ships the daily rollup once into the rollup-store dcc.Store;
+ * after that, switching regions redraws the chart and recomputes the
+ * before/after insights in the browser without a server round-trip. The
+ * event date and +-days window controls are honoured the same way, the
+ * date-range picker slices the sorted date axis by binary search, and a
+ * weekly/monthly/quarterly granularity averages the slice in one pass.
+ */
+function lowerBound(values, target) {
+    var lo = 0, hi = values.length;
+    while (lo < hi) {
+        var mid = (lo + hi) >>> 1;
+        if (values[mid] < target) {
+            lo = mid + 1;
+        } else {
+            hi = mid;
+        }
+    }
+    return lo;
+}
+
+// Bucket key of an ISO date, matching downsample.bucket_keys
+function bucketKey(date, granularity) {
+    if (granularity === 'weekly') {
+        return Math.floor((Date.parse(date) / 86400000 + 3) / 7);
+    }
+    var month = parseInt(date.slice(0, 4), 10) * 12 + parseInt(date.slice(5, 7), 10) - 1;
+    return granularity === 'quarterly' ? Math.floor(month / 3) : month;
+}
+
+// Mean per bucket, labelled with its first day with data; buckets never
+// straddle the event date
+var COARSE = ['weekly', 'monthly', 'quarterly'];
+
+function resample(dates, sales, granularity, eventDate) {
+    if (COARSE.indexOf(granularity) < 0) {
+        return {x: dates, y: sales};
+    }
+    var x = [], y = [], sum = 0, count = 0, label = null, current = null;
+    for (var i = 0; i <= dates.length; i++) {
+        var key = i < dates.length ? bucketKey(dates[i], granularity) + (dates[i] >= eventDate ? 'a' : 'b') : null;
+        if (key !== current) {
+            if (count) {
+                x.push(label);
+                y.push(Math.round(sum / count * 100) / 100);
+            }
+            current = key;
+            sum = 0;
+            count = 0;
+        }
+        if (i < dates.length && sales[i] !== null) {
+            if (!count) {
+                label = dates[i];
+            }
+            sum += sales[i];
+            count++;
+        }
+    }
+    return {x: x, y: y};
+}
+
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    soul_foods: {
+        switch_region: function(region, eventPick, windowDays, startDate, endDate, granularity, store, figure) {
+            if (!store || !store.sales[region]) {
+                return [window.dash_clientside.no_update, window.dash_clientside.no_update];
+            }
+            var dates = store.dates;
+            var sales = store.sales[region];
+            var eventDate = eventPick ? eventPick.slice(0, 10) : store.event;
+            var days = windowDays === 'full' || windowDays === null || windowDays === undefined ? null : windowDays;
+            var dayMs = 86400000;
+            var eventMs = Date.parse(eventDate);
+            var windowStart = days === null ? '' : new Date(eventMs - days * dayMs).toISOString().slice(0, 10);
+            var windowEnd = days === null ? '\uffff' : new Date(eventMs + days * dayMs).toISOString().slice(0, 10);
+
+            // Chart: reuse the prebuilt figure, swapping in the region's trace
+            // for the picked date range (dates are sorted ISO strings)
+            var first = startDate ? lowerBound(dates, startDate.slice(0, 10)) : 0;
+            var last = endDate ? lowerBound(dates, endDate.slice(0, 10) + '\uffff') : dates.length;
+            var points = resample(dates.slice(first, last), sales.slice(first, last), granularity, eventDate);
+            var trace = Object.assign({}, figure.data[0], {x: points.x, y: points.y});
+            var xaxis = startDate || endDate
+                ? Object.assign({}, figure.layout.xaxis, {autorange: false, range: [
+                    startDate ? startDate.slice(0, 10) : dates[0],
+                    endDate ? endDate.slice(0, 10) : dates[dates.length - 1]]})
+                : Object.assign({}, figure.layout.xaxis, {autorange: true});
+            var productTitle = store.product.replace(/\b\w/g, function(c) { return c.toUpperCase(); });
+            var title = region === 'all' ? 'All Regions' : region.charAt(0).toUpperCase() + region.slice(1) + ' Region';
+            if (COARSE.indexOf(granularity) >= 0) {
+                title += ' (' + granularity + ' average)';
+            }
+            var isPriceIncrease = eventDate === store.event;
+            var month = new Date(eventMs).toLocaleString('en-US', {month: 'short', timeZone: 'UTC'});
+            var day = new Date(eventMs).getUTCDate();
+            var year = new Date(eventMs).getUTCFullYear();
+            var eventLabel = month + ' ' + day + ', ' + year;
+            var layout = Object.assign({}, figure.layout, {
+                title: Object.assign({}, figure.layout.title, {text: productTitle + ' Sales Over Time - ' + title}),
+                xaxis: xaxis,
+                shapes: [Object.assign({}, figure.layout.shapes[0], {x0: eventMs, x1: eventMs})],
+                annotations: [Object.assign({}, figure.layout.annotations[0], {
+                    x: eventMs, text: (isPriceIncrease ? 'Price Increase' : 'Event') + '<br>' + eventLabel
+                })]
+            });
+            var newFigure = Object.assign({}, figure, {data: [trace], layout: layout});
+
+            // Insights: mean daily sales before and after the event (within the window)
+            var beforeSum = 0, beforeCount = 0, afterSum = 0, afterCount = 0;
+            for (var i = 0; i < dates.length; i++) {
+                if (sales[i] === null || dates[i] < windowStart || dates[i] >= windowEnd) {
+                    continue;
+                }
+                if (dates[i] < eventDate) {
+                    beforeSum += sales[i];
+                    beforeCount++;
+                } else {
+                    afterSum += sales[i];
+                    afterCount++;
+                }
+            }
+            if (!beforeCount || !afterCount) {
+                return [newFigure, {
+                    type: 'P', namespace: 'dash_html_components',
+                    props: {children: 'Select a region to see detailed analysis.',
+                            style: {fontSize: '16px', fontStyle: 'italic'}}
+                }];
+            }
+            var before = beforeSum / beforeCount;
+            var after = afterSum / afterCount;
+            var change = after - before;
+            var changePercent = change / before * 100;
+            var money = function(value) {
+                return '$' + value.toLocaleString('en-US', {minimumFractionDigits: 2, maximumFractionDigits: 2});
+            };
+            var regionText = region === 'all' ? 'all regions combined' : 'the ' + region + ' region';
+            var eventText = (isPriceIncrease ? 'price increase' : eventLabel)
+                + (days === null ? '' : ' (±' + days + ' days)');
+            var br = {type: 'Br', namespace: 'dash_html_components', props: {}};
+            var insights = {
+                type: 'P', namespace: 'dash_html_components',
+                props: {
+                    style: {fontSize: '16px', lineHeight: '1.6'},
+                    children: [
+                        '🎯 Analysis for ' + regionText + ':', br,
+                        '• Average daily sales before ' + eventText + ': ' + money(before), br,
+                        '• Average daily sales after ' + eventText + ': ' + money(after), br,
+                        {
+                            type: 'Span', namespace: 'dash_html_components',
+                            props: {
+                                style: {color: change > 0 ? '#28a745' : '#dc3545', fontWeight: 'bold'},
+                                children: (change > 0 ? '📈 Sales increased by ' : '📉 Sales decreased by ')
+                                    + money(Math.abs(change)) + ' (' + Math.abs(changePercent).toFixed(1) + '%)'
+                            }
+                        }
+                    ]
+                }
+            };
+            return [newFigure, {type: 'Div', namespace: 'dash_html_components', props: {children: [insights]}}];
+        }
+    }
+});
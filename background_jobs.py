@@ -0,0 +1,84 @@
+"""
+Background callback manager for the dashboard's heavy analyses
+
+Dash background callbacks run in a separate process and report progress
+and results through a shared store, so a multi-second analysis never
+holds a server worker. Dash ships a manager for diskcache (local) and one
+for Celery (which needs a broker). job_manager() uses Dash's diskcache
+manager when diskcache is installed. Without it, LocalJobManager runs the
+same job protocol on callback_cache.DiskCache, a directory of pickle
+files, so the only requirements are the multiprocess and psutil packages
+Dash already uses for this.
+
+Jobs are forked from the server process, so they start with whatever data
+it has loaded. Cancelling a job kills its process. Every worker on a host
+that points at the same DASH_JOB_DIR can serve the progress and result
+polls of any job. Job results are pickles, so the directory gets the same
+ownership checks as the shared callback cache. The store is opened, and the
+directory created and checked, when the first job is submitted or polled,
+so importing an app never touches it.
+"""
+import functools
+import os
+import threading
+
+from dash.long_callback.managers import BaseLongCallbackManager
+from dash.long_callback.managers.diskcache_manager import DiskcacheManager
+
+from callback_cache import USER_CACHE_DIR, DiskCache, private_directory
+
+JOB_DIR = os.environ.get('DASH_JOB_DIR') or os.path.join(USER_CACHE_DIR, 'jobs')
+# Results and progress entries are removed once read; this only bounds leftovers
+MAX_JOB_ENTRIES = 1024
+
+
+class LazyStore:
+    """A job store opened by open_store() on first use
+
+    Dash hands the manager's store to every background callback as it is
+    registered, at import, so the store itself defers opening.
+    """
+
+    def __init__(self, open_store):
+        self._open_store = open_store
+        self._store = None
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        if self._store is None:
+            with self._lock:
+                if self._store is None:
+                    self._store = self._open_store()
+        return getattr(self._store, name)
+
+
+def open_diskcache(directory):
+    """A diskcache.Cache in the private directory"""
+    import diskcache
+
+    return diskcache.Cache(private_directory(directory))
+
+
+class LocalJobManager(DiskcacheManager):
+    """Dash's diskcache background-callback manager on a store opened at the first job
+
+    The store is a callback_cache.DiskCache unless open_store opens another
+    (a diskcache.Cache, say).
+    """
+
+    def __init__(self, directory=JOB_DIR, cache_by=None, expire=None, open_store=None):
+        self.handle = LazyStore(open_store or functools.partial(DiskCache, directory, MAX_JOB_ENTRIES))
+        self.expire = expire
+        BaseLongCallbackManager.__init__(self, cache_by)
+
+
+def job_manager(directory=None):
+    """A background callback manager storing jobs under directory (default JOB_DIR), with no external broker"""
+    directory = directory or JOB_DIR
+    try:
+        import diskcache  # noqa: F401
+    except ImportError:
+        return LocalJobManager(directory)
+    return LocalJobManager(directory, open_store=functools.partial(open_diskcache, directory))
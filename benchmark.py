@@ -0,0 +1,362 @@
+"""
+Benchmark suite for the Soul Foods dashboard hot paths
+
+Generates synthetic datasets in the processed_transaction_data.csv schema
+(sales, date, region) at several scales and times:
+- csv_load: parsing the processed CSV (data_loader.read_csv)
+- binary_load: reading the memory-mapped Feather copy (data_loader.read_columnar)
+- groupby: building the daily region rollup from the compacted frame
+- update_chart: the dash_app chart callback with its caches cleared
+- figure_json: serializing the full-history figure to JSON
+- patch_json: serializing the partial update update_chart actually returns
+
+figure_json and patch_json use the app's JSON engine (orjson unless
+DASH_JSON_ENGINE=json or it is not installed), recorded with each result.
+
+Synthetic data keeps the real date span (1,470 days from 2018-02-06) and
+adds rows per day as the scale grows. Files are generated once per scale and
+seed under benchmark_data/.
+
+Separately, the sales-chart Patch is encoded at several sizes in points
+(--points) with the standard library JSON engine (payload_json), orjson
+(payload_orjson) and orjson with the sales as a base64 typed array
+(payload_typed). Each result also records the payload size in bytes, raw and
+after each response compression the server supports.
+
+Each run is saved as JSON under benchmark_results/, tagged with the git
+commit, so runs from two commits can be compared:
+    python benchmark.py                           # 10k and 1m rows
+    python benchmark.py --scales 10k 1m 100m      # 100m is ~2.7 GB of CSV
+    python benchmark.py --points 560 1470 100000  # chart payload sizes
+    python benchmark.py --compare benchmark_results/<baseline>.json
+"""
+import argparse
+import base64
+import json
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+import data_loader
+import payloads
+import rollup
+from sales_stats import PRICE_INCREASE_DATE
+
+SCALES = ['10k', '1m', '100m']
+DEFAULT_SCALES = ['10k', '1m']
+# A capped chart view, the full daily history, and uncapped figures
+PAYLOAD_POINTS = [560, 1470, 10_000, 100_000]
+REGIONS = ['north', 'south', 'east', 'west']
+START_DATE = pd.Timestamp('2018-02-06')
+N_DAYS = 1470
+CHUNK_ROWS = 1_000_000
+DATA_DIR = 'benchmark_data'
+RESULTS_DIR = 'benchmark_results'
+REPEAT = 5
+MIN_SAMPLE = 0.05
+THRESHOLD = 1.25
+
+
+def parse_scale(scale):
+    """Row count for a scale name such as '10k', '1m' or '250000'"""
+    scale = str(scale).lower()
+    multiplier = {'k': 1_000, 'm': 1_000_000}.get(scale[-1:], 1)
+    return int(float(scale.rstrip('km')) * multiplier)
+
+
+def synthetic_chunk(first_row, n_rows, total_rows, seed=0):
+    """Rows [first_row, first_row + n_rows) of a synthetic dataset of total_rows
+
+    Rows are spread evenly over N_DAYS days in date order, cycling through
+    the regions; sales are price x quantity with the price stepping from
+    $3 to $5 on the price increase date.
+    """
+    rows = np.arange(first_row, first_row + n_rows, dtype=np.int64)
+    days = rows * N_DAYS // total_rows
+    dates = START_DATE.to_datetime64().astype('datetime64[D]') + days
+    rng = np.random.default_rng([seed, first_row])
+    quantity = rng.integers(100, 1000, n_rows)
+    price = np.where(dates >= PRICE_INCREASE_DATE.to_datetime64().astype('datetime64[D]'), 5.0, 3.0)
+    return pd.DataFrame({
+        'sales': price * quantity,
+        'date': dates.astype('datetime64[ns]'),
+        'region': np.asarray(REGIONS)[rows % len(REGIONS)]
+    })
+
+
+def iter_synthetic(n_rows, seed=0, chunk_rows=CHUNK_ROWS):
+    """Yield a synthetic dataset of n_rows in chunks of at most chunk_rows"""
+    for first_row in range(0, n_rows, chunk_rows):
+        yield synthetic_chunk(first_row, min(chunk_rows, n_rows - first_row), n_rows, seed)
+
+
+def create_sales_data(n_rows=10_000, seed=0, chunk_rows=CHUNK_ROWS):
+    """A synthetic frame in the processed schema, like test_utils.create_test_data but sized"""
+    return pd.concat(iter_synthetic(n_rows, seed, chunk_rows), ignore_index=True)
+
+
+def write_synthetic(path, n_rows, seed=0, chunk_rows=CHUNK_ROWS):
+    """Stream a synthetic dataset to a processed-schema CSV without holding it in memory"""
+    tmp_file = path + '.tmp'
+    with open(tmp_file, 'w', newline='') as writer:
+        writer.write('sales,date,region\n')
+        for chunk in iter_synthetic(n_rows, seed, chunk_rows):
+            chunk.to_csv(writer, header=False, index=False, date_format='%Y-%m-%d')
+    os.replace(tmp_file, path)
+    return path
+
+
+def ensure_dataset(scale, seed=0, data_dir=DATA_DIR):
+    """Path of the CSV for a scale, generating it (and its Feather copy) if missing"""
+    os.makedirs(data_dir, exist_ok=True)
+    path = os.path.join(data_dir, f'sales_{scale}_seed{seed}.csv')
+    if not os.path.exists(path):
+        write_synthetic(path, parse_scale(scale), seed)
+    if data_loader.feather is not None and not data_loader.is_fresh(data_loader.columnar_path(path), path):
+        data_loader.convert_csv(path)
+    return path
+
+
+def time_call(func, repeat=REPEAT, min_sample=MIN_SAMPLE):
+    """Per-call wall-clock seconds of func over repeat samples: min, median and mean
+
+    Fast functions are looped within each sample until it lasts at least
+    min_sample seconds, as timeit does, so sub-millisecond timings are not
+    dominated by timer noise.
+    """
+    start = time.perf_counter()
+    func()
+    first = time.perf_counter() - start
+    number = max(1, math.ceil(min_sample / first)) if first > 0 else 1000
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        times.append((time.perf_counter() - start) / number)
+    return {'min': min(times), 'median': statistics.median(times),
+            'mean': statistics.fmean(times), 'repeat': repeat, 'number': number}
+
+
+def bench_update_chart(dash_app, path, repeat, engine):
+    """Time dash_app.update_chart on the dataset at path, uncached, then restore the app"""
+    import plotly.io.json as plotly_json
+
+    catalog, dataset = dash_app.catalog, dash_app.dataset
+    try:
+        dash_app.catalog = data_loader.ProductCatalog(csv_file=path)
+        dash_app.dataset = dash_app.catalog.dataset()
+        dash_app.dataset.get()
+
+        def cold_update():
+            dash_app.chart_view.cache.clear()
+            dash_app.region_insights.cache.clear()
+            return dash_app.update_chart('all')
+
+        chart = time_call(cold_update, repeat)
+        patch, _ = cold_update()
+        patch_json = time_call(lambda: plotly_json.to_json_plotly(patch, engine=engine), repeat)
+        return chart, patch_json
+    finally:
+        dash_app.catalog, dash_app.dataset = catalog, dataset
+
+
+def figure_for(daily):
+    """The full-history figure (every daily point) as the pre-Patch apps sent it"""
+    import dash_app
+    import plotly.graph_objects as go
+
+    fig = go.Figure(dash_app.BASE_FIGURE)
+    fig.update_traces(x=daily['date'], y=daily['sales'])
+    return fig
+
+
+def typed_array(values, dtype='f8'):
+    """values as a plotly.js typed array spec: base64 of the raw bytes"""
+    data = np.ascontiguousarray(values, dtype=dtype)
+    return {'dtype': dtype, 'bdata': base64.b64encode(data.tobytes()).decode('ascii')}
+
+
+def chart_patch(points, typed=False, seed=0):
+    """The Patch update_chart sends for a view of points daily values"""
+    from dash import Patch
+
+    dates = START_DATE.to_datetime64().astype('datetime64[D]') + np.arange(points)
+    sales = np.random.default_rng(seed).uniform(1_000, 90_000, points).round(2)
+    patch = Patch()
+    patch['data'][0]['x'] = np.datetime_as_string(dates, unit='D')
+    patch['data'][0]['y'] = typed_array(sales) if typed else sales
+    patch['layout']['title']['text'] = 'Pink Morsel Sales Over Time - All Regions'
+    return patch
+
+
+def bench_payload(points, repeat=REPEAT, seed=0):
+    """(name, timing) pairs for encoding the chart Patch with each JSON path, with its sizes"""
+    import plotly.io.json as plotly_json
+
+    variants = [('payload_json', 'json', False)]
+    if payloads.orjson is not None:
+        variants += [('payload_orjson', 'orjson', False), ('payload_typed', 'orjson', True)]
+    else:
+        variants += [('payload_typed', 'json', True)]
+
+    timings = []
+    for name, engine, typed in variants:
+        patch = chart_patch(points, typed, seed)
+        timing = time_call(lambda: plotly_json.to_json_plotly(patch, engine=engine), repeat)
+        data = plotly_json.to_json_plotly(patch, engine=engine).encode()
+        timing['bytes'] = len(data)
+        for encoding in payloads.encodings():
+            timing[f'{encoding}_bytes'] = len(payloads.compress(data, encoding))
+        timings.append((name, timing))
+    return timings
+
+
+def run_suite(scales=DEFAULT_SCALES, repeat=REPEAT, seed=0, data_dir=DATA_DIR, points=PAYLOAD_POINTS):
+    """Run every benchmark at every scale and payload size and return a results dict"""
+    import dash_app
+
+    # The engine the app encodes with, set explicitly so figure_json and
+    # patch_json measure it whatever plotly's default happens to be
+    engine = payloads.use_json_engine()
+    results = []
+
+    def report(result):
+        results.append(result)
+        sizes = ''.join(f", {'raw' if key == 'bytes' else key[:-len('_bytes')]} {result[key] / 1024:.1f} KB"
+                        for key in result if key.endswith('bytes'))
+        print(f"⏱️ {result['name']:<14} {result['scale']:>8}: min {result['min'] * 1000:10.2f} ms, "
+              f"median {result['median'] * 1000:10.2f} ms{sizes}")
+
+    for scale in scales:
+        n_rows = parse_scale(scale)
+        path = ensure_dataset(scale, seed, data_dir)
+
+        def record(name, timing, **extra):
+            report(dict(timing, name=name, scale=scale, rows=n_rows, **extra))
+
+        record('csv_load', time_call(lambda: data_loader.read_csv(path), repeat))
+        if data_loader.feather is not None:
+            columnar = data_loader.columnar_path(path)
+            record('binary_load', time_call(lambda: data_loader.read_columnar(columnar), repeat))
+
+        compact = data_loader.compact_frame(data_loader.load_sales_data(path))
+        record('groupby', time_call(lambda: rollup.build_rollup(compact), repeat))
+
+        fig = figure_for(rollup.build_rollup(compact)[rollup.ALL_REGIONS])
+        del compact
+        record('figure_json', time_call(lambda: fig.to_json(engine=engine), repeat), engine=engine)
+
+        chart, patch_json = bench_update_chart(dash_app, path, repeat, engine)
+        record('update_chart', chart)
+        record('patch_json', patch_json, engine=engine)
+
+    for n_points in points:
+        for name, timing in bench_payload(n_points, repeat, seed):
+            report(dict(timing, name=name, scale=f'{n_points}pt', points=n_points))
+
+    return {'meta': run_metadata(), 'results': results}
+
+
+def git_commit():
+    """Short hash of HEAD (with '-dirty' for uncommitted changes), or None outside git"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'],
+                               capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return commit + ('-dirty' if dirty else '')
+
+
+def run_metadata():
+    """Where and on what a run happened, so results are only compared like for like"""
+    import dash
+    import plotly
+
+    return {
+        'commit': git_commit(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'versions': {'numpy': np.__version__, 'pandas': pd.__version__,
+                     'plotly': plotly.__version__, 'dash': dash.__version__,
+                     'orjson': payloads.orjson.__version__ if payloads.orjson is not None else None,
+                     'pyarrow': data_loader.pa.__version__ if data_loader.pa is not None else None}
+    }
+
+
+def save_results(run, results_dir=RESULTS_DIR):
+    """Write a run to results_dir as <timestamp>-<commit>.json and return the path"""
+    os.makedirs(results_dir, exist_ok=True)
+    stamp = run['meta']['timestamp'].replace(':', '').replace('-', '')
+    path = os.path.join(results_dir, f"{stamp}-{run['meta']['commit'] or 'nogit'}.json")
+    with open(path, 'w') as f:
+        json.dump(run, f, indent=2)
+    return path
+
+
+def compare(baseline, current, threshold=THRESHOLD):
+    """Pair up results by (name, scale) and flag those slower than threshold x baseline
+
+    Compares the minimum time, the least noisy of the statistics.
+    """
+    before = {(r['name'], r['scale']): r for r in baseline['results']}
+    rows = []
+    for result in current['results']:
+        old = before.get((result['name'], result['scale']))
+        if old is None:
+            continue
+        ratio = result['min'] / old['min'] if old['min'] > 0 else float('inf')
+        rows.append({'name': result['name'], 'scale': result['scale'],
+                     'baseline': old['min'], 'current': result['min'],
+                     'ratio': ratio, 'regressed': ratio > threshold})
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the dashboard load, aggregation and callback paths")
+    parser.add_argument('--scales', nargs='+', default=DEFAULT_SCALES,
+                        help=f"Dataset sizes in rows, e.g. {' '.join(SCALES)}")
+    parser.add_argument('--points', nargs='+', type=int, default=PAYLOAD_POINTS,
+                        help="Chart sizes in points for the payload benchmarks")
+    parser.add_argument('--repeat', type=int, default=REPEAT)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--data-dir', default=DATA_DIR)
+    parser.add_argument('--results-dir', default=RESULTS_DIR)
+    parser.add_argument('--compare', metavar='BASELINE_JSON',
+                        help="Compare against an earlier run and exit 1 on regressions")
+    parser.add_argument('--threshold', type=float, default=THRESHOLD,
+                        help="Slowdown ratio counted as a regression")
+    args = parser.parse_args(argv)
+
+    print(f"🏁 Benchmarking scales {', '.join(args.scales)} ({args.repeat} repeats)")
+    run = run_suite(args.scales, args.repeat, args.seed, args.data_dir, args.points)
+    print(f"💾 Results saved to {save_results(run, args.results_dir)}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        rows = compare(baseline, run, args.threshold)
+        print(f"📊 Against {baseline['meta']['commit']} ({args.compare}):")
+        for row in rows:
+            flag = "❌" if row['regressed'] else "✅"
+            print(f"{flag} {row['name']:<14} {row['scale']:>8}: {row['baseline'] * 1000:10.2f} ms -> "
+                  f"{row['current'] * 1000:10.2f} ms ({row['ratio']:.2f}x)")
+        if any(row['regressed'] for row in rows):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
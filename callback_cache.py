@@ -0,0 +1,253 @@
+"""
+Memoization for the dashboard callbacks
+
+The region callbacks are pure functions of (selected_region, dataset), so
+their results can be reused across clicks and users. Entries are keyed by
+the callback arguments plus a data version; when the dataset changes, the
+version changes and stale entries are never served again (they age out of
+the bounded LRU).
+
+Set DASH_CACHE_DIR to share results between worker processes on a host:
+entries are then stored as pickle files in that directory, so a figure
+computed by one worker is reused by all of them without an external service.
+Entries are unpickled, so anyone who can write to the directory can run code
+in the app: it is created private (0700), and an existing directory owned by
+another user or writable by others is refused.
+"""
+import fcntl
+import functools
+import hashlib
+import inspect
+import os
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from plotly.basedatatypes import BaseFigure
+
+CACHE_DIR = os.environ.get('DASH_CACHE_DIR')
+# Per-user default location for shared stores, instead of the world-writable temp dir
+USER_CACHE_DIR = os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'), 'soul-foods')
+
+
+def private_directory(path):
+    """Create path as a 0700 directory, or check an existing one is only writable by us
+
+    Raises PermissionError if it is a symlink, belongs to another user or is
+    writable by group or others, since the pickles in it are trusted.
+    """
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    stat = os.lstat(path)
+    if not os.path.isdir(path) or os.path.islink(path):
+        raise PermissionError(f"{path} is not a directory")
+    if stat.st_uid != os.getuid() or stat.st_mode & 0o022:
+        raise PermissionError(f"{path} must be owned by the current user and not writable by others "
+                              f"(owner {stat.st_uid}, mode {stat.st_mode & 0o777:o})")
+    return path
+
+
+class LRUCache:
+    """A thread-safe, bounded least-recently-used mapping"""
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def info(self):
+        return {'hits': self.hits, 'misses': self.misses,
+                'size': len(self._data), 'maxsize': self.maxsize}
+
+
+def to_portable(value):
+    """Replace plotly figures with plain dicts, which unpickle far faster"""
+    if isinstance(value, BaseFigure):
+        return value.to_dict()
+    if isinstance(value, (tuple, list)):
+        return type(value)(to_portable(item) for item in value)
+    return value
+
+
+class DiskCache:
+    """A bounded cache shared by every process that uses the same directory
+
+    Each entry is one pickle file named by the hash of its key. Writes go
+    through a temporary file and os.replace, so readers never see partial
+    entries. Reads touch the file, and the least recently used files are
+    removed once there are more than maxsize entries.
+    """
+
+    def __init__(self, directory, maxsize=128):
+        self.directory = directory
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        private_directory(directory)
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha256(repr(key).encode()).hexdigest() + '.pkl')
+
+    def get(self, key, default=None):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                stored_key, value = pickle.load(f)
+            os.utime(path)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            self.misses += 1
+            return default
+        if stored_key != key:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return value
+
+    def set(self, key, value):
+        fd, tmp_file = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump((key, to_portable(value)), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_file, self._path(key))
+        except OSError:
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+            return
+        self._evict()
+
+    def delete(self, key):
+        """Remove an entry; return whether it existed"""
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def touch(self, key, expire=None):
+        """Mark an entry as recently used (expire is accepted for diskcache compatibility)"""
+        try:
+            os.utime(self._path(key))
+        except FileNotFoundError:
+            return False
+        return True
+
+    @contextmanager
+    def transact(self):
+        """Hold an exclusive lock on the directory, across processes"""
+        with open(os.path.join(self.directory, '.lock'), 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _entries(self):
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.pkl'):
+                try:
+                    entries.append((entry.stat().st_mtime, entry.path))
+                except FileNotFoundError:
+                    pass
+        return entries
+
+    def _evict(self):
+        entries = self._entries()
+        if len(entries) <= self.maxsize:
+            return
+        for _, path in sorted(entries)[:len(entries) - self.maxsize]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def clear(self):
+        for _, path in self._entries():
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries())
+
+    def info(self):
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self),
+                'maxsize': self.maxsize, 'directory': self.directory}
+
+
+def make_cache(name, maxsize=128, cache_dir=None):
+    """Return a shared DiskCache when a cache directory is configured, else an in-process LRU"""
+    cache_dir = cache_dir or CACHE_DIR
+    if cache_dir:
+        return DiskCache(os.path.join(private_directory(cache_dir), name), maxsize)
+    return LRUCache(maxsize)
+
+
+_MISSING = object()
+
+
+def memoize(version=lambda: None, maxsize=128, cache_dir=None):
+    """Cache a callback's return value by (version(...), args)
+
+    version is called on every invocation and should return a cheap,
+    hashable token for the data the call reads (see data_loader.data_version).
+    It may take any of the callback's parameters by name, e.g. a product, so
+    each entry depends only on the data it was computed from. Results are
+    shared across processes when cache_dir (or DASH_CACHE_DIR) is set. The
+    cache is available as wrapper.cache.
+    """
+    def decorator(func):
+        cache = make_cache(f"{func.__module__}.{func.__qualname__}", maxsize, cache_dir)
+        names = list(inspect.signature(version).parameters)
+        signature = inspect.signature(func) if names else None
+
+        def version_of(args):
+            if signature is None:
+                return version()
+            bound = signature.bind(*args)
+            bound.apply_defaults()
+            return version(**{name: bound.arguments[name] for name in names})
+
+        @functools.wraps(func)
+        def wrapper(*args):
+            key = (version_of(args), args)
+            result = cache.get(key, _MISSING)
+            if result is _MISSING:
+                result = func(*args)
+                cache.set(key, result)
+            return result
+
+        wrapper.cache = cache
+        return wrapper
+    return decorator
@@ -1,13 +1,93 @@
 
+import os
+
 import dash
-from dash import dcc, html, Input, Output
+from dash import dcc, html, ClientsideFunction, Input, Output, Patch, State, ctx, no_update
+from dash.exceptions import PreventUpdate
+from flask import Response, jsonify, request
+import numpy as np
 import pandas as pd
-import plotly.express as px
+from background_jobs import job_manager
+from callback_cache import memoize
+from data_loader import DEFAULT_PRODUCT, ProductCatalog
+from downsample import FREQUENCIES, RESOLUTIONS, at_resolution
+from instrumentation import PROFILE_ENABLED, SamplingProfiler, metrics
+from live_refresh import REFRESH_SECONDS, LiveRefresher
+from payloads import COMPRESS_ENABLED, compress_responses, use_json_engine
+from rollup import lookup, to_payload
+from sales_stats import EVENT_WINDOWS, PRICE_INCREASE_DATE, change_sweep
 import plotly.graph_objects as go
 
-# Load and prepare data
-df = pd.read_csv('processed_transaction_data.csv')
-df['date'] = pd.to_datetime(df['date'])
+# Load and prepare data lazily: the CSV is parsed (and the daily/region rollup
+# built) on first use, not at import time. Each product is loaded from its own
+# partition only when it is first selected.
+catalog = ProductCatalog()
+dataset = catalog.dataset(DEFAULT_PRODUCT)
+PRODUCTS = catalog.products()
+
+# New raw shards landing in data/ are folded into the open datasets; the
+# refresh-interval timer polls for them and sends clients only what changed.
+# DASH_REFRESH_SECONDS=0 turns this off.
+live = LiveRefresher(catalog)
+
+# Heavy analyses run as background callbacks in a separate process, with
+# progress and results passed through a local job directory (DASH_JOB_DIR)
+background_manager = job_manager()
+
+# DASH_CLIENTSIDE=1 ships the daily rollup to the browser once and switches
+# regions there (assets/clientside.js) instead of calling the server
+CLIENTSIDE_MODE = os.environ.get('DASH_CLIENTSIDE') == '1'
+
+# Plot area width in pixels (1200px page minus padding). Each view of the
+# chart is re-aggregated to at most one point per two pixels: the full
+# history loads as weekly averages and zooming in fetches daily points for
+# just the visible window.
+CHART_WIDTH = 1120
+MAX_CHART_POINTS = CHART_WIDTH // 2
+
+def marker_label(event):
+    """Annotation text for the vertical event marker"""
+    name = "Price Increase" if event == PRICE_INCREASE_DATE else "Event"
+    return f"{name}<br>{event:%b} {event.day}, {event.year}"
+
+def build_base_figure():
+    """Static parts of the sales chart: styling, axes and the price increase
+    marker. Built once; callbacks patch in only the trace data and title."""
+    fig = go.Figure(go.Scatter(
+        x=[], y=[], mode='lines',
+        line={'color': '#667eea', 'width': 3},
+        hovertemplate='Date=%{x}<br>Total Daily Sales ($)=%{y}<extra></extra>'
+    ))
+
+    # Add price increase line
+    fig.add_vline(x=PRICE_INCREASE_DATE.timestamp() * 1000,
+                  line_dash="dash", 
+                  line_color="red",
+                  line_width=3,
+                  annotation_text=marker_label(PRICE_INCREASE_DATE),
+                  annotation_position="top right")
+    
+    # Style the chart
+    fig.update_layout(
+        title_text='Pink Morsel Sales Over Time',
+        title_font_size=20,
+        title_font_color='#2c3e50',
+        xaxis_title='Date',
+        yaxis_title='Total Daily Sales ($)',
+        xaxis_type='date',
+        xaxis_title_font_size=14,
+        yaxis_title_font_size=14,
+        height=500,
+        plot_bgcolor='white',
+        paper_bgcolor='white',
+        font_family="Arial",
+        showlegend=False,
+        # Keep the user's zoom when new data for the window arrives
+        uirevision='sales-chart'
+    )
+    return fig
+
+BASE_FIGURE = build_base_figure()
 
 # Create the Dash app
 app = dash.Dash(__name__)
@@ -45,6 +125,24 @@ app.layout = html.Div([
     
     # Controls Section
     html.Div([
+        html.Div([
+            html.H4("🍬 Select Product:", 
+                   style={'color': '#2c3e50', 'marginBottom': '15px', 'fontFamily': 'Arial, sans-serif'}),
+            dcc.Dropdown(
+                id='product-filter',
+                options=[{'label': product.title(), 'value': product} for product in PRODUCTS],
+                value=DEFAULT_PRODUCT,
+                clearable=False,
+                style={'fontSize': '16px', 'fontFamily': 'Arial, sans-serif'}
+            )
+        ], style={
+            'backgroundColor': '#f8f9fa',
+            'padding': '25px',
+            'borderRadius': '10px',
+            'border': '2px solid #e9ecef',
+            'boxShadow': '0 4px 6px rgba(0,0,0,0.1)',
+            'marginBottom': '20px'
+        }),
         html.Div([
             html.H4("📍 Select Region to Analyze:", 
                    style={'color': '#2c3e50', 'marginBottom': '15px', 'fontFamily': 'Arial, sans-serif'}),
@@ -60,6 +158,26 @@ app.layout = html.Div([
                 value='all',
                 style={'fontSize': '16px', 'fontFamily': 'Arial, sans-serif'},
                 labelStyle={'display': 'block', 'marginBottom': '8px', 'cursor': 'pointer'}
+            ),
+            html.H4("🗓️ Date Range:",
+                   style={'color': '#2c3e50', 'margin': '20px 0 15px', 'fontFamily': 'Arial, sans-serif'}),
+            dcc.DatePickerRange(
+                id='date-range',
+                display_format='MMM D, YYYY',
+                start_date_placeholder_text='First day',
+                end_date_placeholder_text='Last day',
+                clearable=True
+            ),
+            html.H4("📊 Granularity:",
+                   style={'color': '#2c3e50', 'margin': '20px 0 15px', 'fontFamily': 'Arial, sans-serif'}),
+            dcc.RadioItems(
+                id='granularity',
+                options=[{'label': 'Auto', 'value': 'auto'}] +
+                        [{'label': label.title(), 'value': label} for _, label in RESOLUTIONS],
+                value='auto',
+                inline=True,
+                style={'fontSize': '16px', 'fontFamily': 'Arial, sans-serif'},
+                labelStyle={'marginRight': '20px', 'cursor': 'pointer'}
             )
         ], style={
             'backgroundColor': '#f8f9fa',
@@ -67,12 +185,45 @@ app.layout = html.Div([
             'borderRadius': '10px',
             'border': '2px solid #e9ecef',
             'boxShadow': '0 4px 6px rgba(0,0,0,0.1)'
+        }),
+        html.Div([
+            html.H4("📅 Compare Sales Around a Date:", 
+                   style={'color': '#2c3e50', 'marginBottom': '15px', 'fontFamily': 'Arial, sans-serif'}),
+            dcc.DatePickerSingle(
+                id='event-date',
+                date=PRICE_INCREASE_DATE.date(),
+                display_format='MMM D, YYYY'
+            ),
+            dcc.RadioItems(
+                id='event-window',
+                options=[{'label': 'Full history', 'value': 'full'}] +
+                        [{'label': f'±{days} days', 'value': days} for days in EVENT_WINDOWS],
+                value='full',
+                inline=True,
+                style={'fontSize': '16px', 'fontFamily': 'Arial, sans-serif', 'marginTop': '15px'},
+                labelStyle={'marginRight': '20px', 'cursor': 'pointer'}
+            )
+        ], style={
+            'backgroundColor': '#f8f9fa',
+            'padding': '25px',
+            'borderRadius': '10px',
+            'border': '2px solid #e9ecef',
+            'boxShadow': '0 4px 6px rgba(0,0,0,0.1)',
+            'marginTop': '20px'
         })
     ], style={'marginBottom': '30px'}),
+
+    # Daily rollup for clientside region switching (filled in CLIENTSIDE_MODE only)
+    dcc.Store(id='rollup-store'),
+
+    # Live refresh: what the chart currently shows, and the polling timer
+    dcc.Store(id='chart-state'),
+    dcc.Interval(id='refresh-interval', interval=max(REFRESH_SECONDS, 1) * 1000,
+                 disabled=REFRESH_SECONDS <= 0),
     
     # Chart Section
     html.Div([
-        dcc.Graph(id='sales-chart')
+        dcc.Graph(id='sales-chart', figure=BASE_FIGURE)
     ], style={
         'backgroundColor': '#ffffff',
         'padding': '20px',
@@ -94,6 +245,36 @@ app.layout = html.Div([
         'border': '2px solid #e9ecef',
         'boxShadow': '0 4px 6px rgba(0,0,0,0.1)'
     }),
+
+    # Deep Analysis Section (runs in the background)
+    html.Div([
+        html.H4("🧪 Bootstrap Sweep",
+               style={'color': '#2c3e50', 'marginBottom': '15px', 'fontFamily': 'Arial, sans-serif'}),
+        html.P("Confidence intervals for the change around the selected date, over every window.",
+               style={'fontSize': '14px', 'color': '#6c757d'}),
+        dcc.RadioItems(
+            id='analysis-scope',
+            options=[{'label': 'Selected product', 'value': 'product'},
+                     {'label': 'All products', 'value': 'all'}],
+            value='product',
+            inline=True,
+            style={'fontSize': '16px', 'fontFamily': 'Arial, sans-serif'},
+            labelStyle={'marginRight': '20px', 'cursor': 'pointer'}
+        ),
+        html.Div([
+            html.Button("▶️ Run", id='analysis-run', n_clicks=0, style={'marginRight': '10px'}),
+            html.Button("⏹️ Cancel", id='analysis-cancel', n_clicks=0, disabled=True),
+            html.Progress(id='analysis-progress', value='0', max='1', style={'marginLeft': '20px', 'width': '300px'})
+        ], style={'margin': '15px 0'}),
+        html.Div(id='analysis-output')
+    ], style={
+        'backgroundColor': '#f8f9fa',
+        'padding': '25px',
+        'borderRadius': '10px',
+        'marginTop': '30px',
+        'border': '2px solid #e9ecef',
+        'boxShadow': '0 4px 6px rgba(0,0,0,0.1)'
+    }),
     
     # Footer
     html.Div([
@@ -110,62 +291,251 @@ app.layout = html.Div([
     'minHeight': '100vh'
 })
 
-# Callback for interactive chart
-@app.callback(
-    [Output('sales-chart', 'figure'),
-     Output('insights-content', 'children')],
-    [Input('region-filter', 'value')]
-)
-def update_chart(selected_region):
-    # Filter data based on selection
+def zoom_window(relayout_data):
+    """Return the (start, end) x-range from relayoutData, (None, None) for the
+    full range, or None when the event did not touch the x-axis"""
+    if not relayout_data or relayout_data.get('xaxis.autorange'):
+        return (None, None)
+    if 'xaxis.range[0]' in relayout_data:
+        return (relayout_data['xaxis.range[0]'], relayout_data['xaxis.range[1]'])
+    if 'xaxis.range' in relayout_data:
+        return tuple(relayout_data['xaxis.range'])
+    return None
+
+def date_window(start_date=None, end_date=None, zoom=(None, None)):
+    """The chart's x-range: the date-range picker's span, narrowed by a zoom
+    inside it. A zoom outside the span (left over from before the span
+    changed) is ignored."""
+    start, end = start_date or None, end_date or None
+    zoom_start, zoom_end = zoom
+    if zoom_start is None:
+        return (start, end)
+    if ((end is not None and pd.Timestamp(zoom_start) > pd.Timestamp(end))
+            or (start is not None and pd.Timestamp(zoom_end) < pd.Timestamp(start))):
+        return (start, end)
+    if start is None or pd.Timestamp(zoom_start) > pd.Timestamp(start):
+        start = zoom_start
+    if end is None or pd.Timestamp(zoom_end) < pd.Timestamp(end):
+        end = zoom_end
+    return (start, end)
+
+def chart_window(relayout_data, start_date=None, end_date=None):
+    """date_window() for the current inputs, or None when a chart event
+    did not touch the x-axis"""
+    zoom = zoom_window(relayout_data)
+    if zoom is None:
+        if ctx.triggered_id == 'sales-chart':
+            return None
+        zoom = (None, None)
+    return date_window(start_date, end_date, zoom)
+
+def event_selection(event_date, window_days):
+    """Normalize the event controls to ('YYYY-MM-DD', days or None)"""
+    event = pd.Timestamp(event_date) if event_date else PRICE_INCREASE_DATE
+    days = None if window_days in (None, 'full') else int(window_days)
+    return event.strftime('%Y-%m-%d'), days
+
+def selected_product(product):
+    """The product a client selected (the default if None); PreventUpdate if the store has no such product"""
+    product = product or DEFAULT_PRODUCT
+    if product not in catalog:
+        raise PreventUpdate
+    return product
+
+def selected_granularity(granularity):
+    """The granularity a client selected ('auto' if None); PreventUpdate if it is not one the chart offers"""
+    granularity = granularity or 'auto'
+    if granularity != 'auto' and granularity not in FREQUENCIES:
+        raise PreventUpdate
+    return granularity
+
+def product_data(product=None):
+    """The loaded Dataset for a product, reading only that product's partition"""
+    return catalog.dataset(product).get()
+
+def data_version(product=DEFAULT_PRODUCT):
+    """Cache token for a memoized view: the data version of the product it reads
+
+    Loading or refreshing one product leaves the cached views of every other
+    product valid, and workers agree on the key whatever else they loaded.
+    """
+    return product_data(product).version
+
+def chart_update(selected_region, relayout_data=None, event_date=None, window_days='full',
+                 product=DEFAULT_PRODUCT, start_date=None, end_date=None, granularity='auto'):
+    """The chart patch, the insights and the chart-state record live refreshes start from"""
+    window = chart_window(relayout_data, start_date, end_date)
+    if window is None:
+        raise PreventUpdate
+    event, days = event_selection(event_date, window_days)
+    product = selected_product(product)
+    granularity = selected_granularity(granularity)
+    with metrics.phase('load'):
+        live.sync(product)
+        data = product_data(product)
+    with metrics.phase('view'):
+        view = chart_view(selected_region, *window, event, product, granularity)
+
+    # Only the trace data, title and x-range change; everything else stays
+    # as built in BASE_FIGURE
+    with metrics.phase('patch'):
+        patch = Patch()
+        patch['data'][0]['x'] = view['x']
+        patch['data'][0]['y'] = view['y']
+        patch['layout']['title']['text'] = view['title']
+        if window == (None, None) or not len(view['x']):
+            patch['layout']['xaxis']['autorange'] = True
+        else:
+            patch['layout']['xaxis']['range'] = [window[0] or view['x'][0], window[1] or view['x'][-1]]
+
+        # Move the event marker
+        event_ms = pd.Timestamp(event).timestamp() * 1000
+        patch['layout']['shapes'][0]['x0'] = event_ms
+        patch['layout']['shapes'][0]['x1'] = event_ms
+        patch['layout']['annotations'][0]['x'] = event_ms
+        patch['layout']['annotations'][0]['text'] = marker_label(pd.Timestamp(event))
+    with metrics.phase('insights'):
+        insights = region_insights(selected_region, event, days, product)
+    state = {
+        'key': [selected_region, *window, event, days, product, granularity],
+        'version': data.version,
+        'points': len(view['x']),
+        'title': view['title'],
+        'exact': view['exact']
+    }
+    return patch, insights, state
+
+# Callback for interactive chart (registered below unless CLIENTSIDE_MODE)
+@metrics.instrument
+def update_chart(selected_region, relayout_data=None, event_date=None, window_days='full',
+                 product=DEFAULT_PRODUCT, start_date=None, end_date=None, granularity='auto'):
+    patch, insights, _ = chart_update(selected_region, relayout_data, event_date, window_days, product,
+                                      start_date, end_date, granularity)
+    return patch, insights
+
+@metrics.instrument(name='update_chart')
+def render_chart(selected_region, relayout_data=None, event_date=None, window_days='full',
+                 product=DEFAULT_PRODUCT, start_date=None, end_date=None, granularity='auto'):
+    """update_chart plus the chart-state record, timed under the same name"""
+    return chart_update(selected_region, relayout_data, event_date, window_days, product,
+                        start_date, end_date, granularity)
+
+@metrics.instrument
+def refresh_chart(n_intervals, state):
+    """Fold in any new shards and send the client only the points that changed
+
+    The chart state records the selection the client shows and the data
+    version it was drawn from. Points before the earliest changed date are
+    kept; the rest (usually the last bucket plus the new days) are deleted
+    and re-sent through Patch extend operations.
+    """
+    if not state:
+        raise PreventUpdate
+    with metrics.phase('poll'):
+        live.poll()
+    selected_region, start, end, event, days, product, granularity = state['key']
+    product = selected_product(product)
+    granularity = selected_granularity(granularity)
+    live.sync(product)
+    data = product_data(product)
+    if data.version == state['version']:
+        raise PreventUpdate
+
+    try:
+        since = data.changed_since(state['version'])
+    except KeyError:
+        since = None
+    with metrics.phase('view'):
+        view = chart_view(selected_region, start, end, event, product, granularity)
+    new_state = dict(state, version=data.version, points=len(view['x']), title=view['title'],
+                     exact=view['exact'])
+    if since is not None and pd.isna(since):
+        return no_update, no_update, new_state
+
+    with metrics.phase('insights'):
+        insights = region_insights(selected_region, event, days, product)
+    if since is not None and end is not None and since > pd.Timestamp(end):
+        return no_update, insights, new_state
+
+    with metrics.phase('patch'):
+        patch = Patch()
+        # LTTB picks its points from the whole series, so any of them may move
+        if since is None or view['title'] != state['title'] or not (view['exact'] and state['exact']):
+            patch['data'][0]['x'] = view['x']
+            patch['data'][0]['y'] = view['y']
+            patch['layout']['title']['text'] = view['title']
+        else:
+            # Keep one extra point back: an aggregated bucket labelled just
+            # before the changed date may include it
+            changed = int(np.searchsorted(view['x'], since.strftime('%Y-%m-%d')))
+            keep = min(max(changed - 1, 0), state['points'])
+            for _ in range(state['points'] - keep):
+                del patch['data'][0]['x'][keep]
+                del patch['data'][0]['y'][keep]
+            patch['data'][0]['x'].extend(view['x'][keep:].tolist())
+            patch['data'][0]['y'].extend(view['y'][keep:].tolist())
+    return patch, insights, new_state
+
+@memoize(version=data_version, maxsize=256)
+def chart_view(selected_region, start=None, end=None, event_date=None, product=DEFAULT_PRODUCT,
+               granularity='auto'):
+    """Trace data and title for one product, region, zoom window and granularity"""
+    # Look up the precomputed daily series for the selection
+    data = product_data(product)
+    filtered_df = lookup(data.rollup, selected_region)
     if selected_region == 'all':
-        filtered_df = df.groupby('date')['sales'].sum().reset_index()
         title_suffix = "All Regions"
-        region_text = "all regions combined"
     else:
-        region_data = df[df['region'] == selected_region]
-        filtered_df = region_data.groupby('date')['sales'].sum().reset_index()
         title_suffix = f"{selected_region.title()} Region"
+
+    # Slice the visible window out of the series at the chosen resolution.
+    # Coarse series are pre-resampled around the price increase; buckets
+    # around any other event date are resampled on demand.
+    event = pd.Timestamp(event_date) if event_date else PRICE_INCREASE_DATE
+    resampled = data.resampled.region(selected_region) if data.resampled.breakpoints == (event,) else None
+    with metrics.phase('resolution'):
+        chart_df, resolution, downsampled = at_resolution(filtered_df, granularity, start, end, MAX_CHART_POINTS,
+                                                          [event], resampled)
+    if resolution != 'daily':
+        title_suffix += f" ({resolution} average)"
+
+    with metrics.phase('format'):
+        return {
+            'x': np.datetime_as_string(chart_df['date'].to_numpy(), unit='D'),
+            'y': chart_df['sales'].to_numpy().round(2),
+            'title': f'{product.title()} Sales Over Time - {title_suffix}',
+            'exact': not downsampled
+        }
+
+@memoize(version=data_version, maxsize=256)
+def region_insights(selected_region, event_date=None, window_days=None, product=DEFAULT_PRODUCT):
+    """Before/after summary for a region around an event date
+
+    The price increase over the full history is looked up from the
+    precomputed statistics (with medians and confidence intervals); any
+    other date or window is answered from the prefix-sum index.
+    """
+    event = pd.Timestamp(event_date) if event_date else PRICE_INCREASE_DATE
+    if event == PRICE_INCREASE_DATE and window_days is None:
+        stats = product_data(product).stats
+    else:
+        stats = product_data(product).windows.event_window(event, window_days)
+    if selected_region == 'all':
+        region_text = "all regions combined"
+    else:
         region_text = f"the {selected_region} region"
+    event_text = "price increase" if event == PRICE_INCREASE_DATE else f"{event:%b} {event.day}, {event.year}"
+    if window_days is not None:
+        event_text += f" (±{window_days} days)"
+
+    # Look up insights computed once for every region when the data loaded
+    row = stats.loc[selected_region] if selected_region in stats.index else None
     
-    # Create the chart
-    fig = px.line(filtered_df, 
-                  x='date', 
-                  y='sales',
-                  title=f'Pink Morsel Sales Over Time - {title_suffix}',
-                  labels={'date': 'Date', 'sales': 'Total Daily Sales ($)'})
-    
-    # Add price increase line
-    price_increase_date = pd.to_datetime('2021-01-15')
-    fig.add_vline(x=price_increase_date.timestamp() * 1000,
-                  line_dash="dash", 
-                  line_color="red",
-                  line_width=3,
-                  annotation_text="Price Increase<br>Jan 15, 2021",
-                  annotation_position="top right")
-    
-    # Style the chart
-    fig.update_layout(
-        title_font_size=20,
-        title_font_color='#2c3e50',
-        xaxis_title_font_size=14,
-        yaxis_title_font_size=14,
-        height=500,
-        plot_bgcolor='white',
-        paper_bgcolor='white',
-        font_family="Arial",
-        showlegend=False
-    )
-    
-    fig.update_traces(line_color='#667eea', line_width=3)
-    
-    # Calculate insights
-    before_increase = filtered_df[filtered_df['date'] < price_increase_date]['sales'].mean()
-    after_increase = filtered_df[filtered_df['date'] >= price_increase_date]['sales'].mean()
-    
-    if pd.notna(before_increase) and pd.notna(after_increase):
-        change = after_increase - before_increase
-        change_percent = (change / before_increase) * 100
+    if row is not None and pd.notna(row['before_mean']) and pd.notna(row['after_mean']):
+        before_increase = row['before_mean']
+        after_increase = row['after_mean']
+        change = row['change']
+        change_percent = row['change_pct']
         
         if change > 0:
             trend_icon = "📈"
@@ -180,21 +550,189 @@ def update_chart(selected_region):
             html.P([
                 f"🎯 Analysis for {region_text}:",
                 html.Br(),
-                f"• Average daily sales before price increase: ${before_increase:,.2f}",
+                f"• Average daily sales before {event_text}: ${before_increase:,.2f}",
                 html.Br(),
-                f"• Average daily sales after price increase: ${after_increase:,.2f}",
+                f"• Average daily sales after {event_text}: ${after_increase:,.2f}",
                 html.Br(),
                 html.Span([
                     f"{trend_icon} Sales {trend_text} by ${abs(change):,.2f} ({abs(change_percent):.1f}%)"
-                ], style={'color': trend_color, 'fontWeight': 'bold'})
+                ], style={'color': trend_color, 'fontWeight': 'bold'}),
+                *([
+                    html.Br(),
+                    f"• Median daily sales: ${row['before_median']:,.2f} before, ${row['after_median']:,.2f} after",
+                    html.Br(),
+                    f"• 95% confidence interval for the change: "
+                    f"{row['change_pct_low']:+.1f}% to {row['change_pct_high']:+.1f}%"
+                ] if 'change_pct_low' in row.index else [])
             ], style={'fontSize': '16px', 'lineHeight': '1.6'})
         ])
     else:
         insights = html.P("Select a region to see detailed analysis.", 
                          style={'fontSize': '16px', 'fontStyle': 'italic'})
     
-    return fig, insights
+    return insights
+
+def run_analysis(set_progress, n_clicks, scope, selected_region, event_date, window_days,
+                 product=DEFAULT_PRODUCT):
+    """Bootstrap statistics for every window (and optionally every product), as a table
+
+    Runs as a background callback: set_progress moves the progress bar
+    after each (product, window) pair.
+    """
+    event, _ = event_selection(event_date, window_days)
+    products = PRODUCTS if scope == 'all' else [selected_product(product)]
+    total = len(products) * (len(EVENT_WINDOWS) + 1)
+    set_progress(('0', str(total)))
+    rollups = {}
+    for name in products:
+        live.sync(name)
+        rollups[name] = product_data(name).rollup
+    sweep = change_sweep(rollups, selected_region, event,
+                         progress=lambda done, total: set_progress((str(done), str(total))))
+    return analysis_table(sweep, selected_region, event)
+
+def analysis_table(sweep, selected_region, event):
+    """Render change_sweep rows as an HTML table"""
+    if sweep.empty:
+        return html.P("No data for this selection.", style={'fontStyle': 'italic'})
+    header = ['Product', 'Window', 'Before', 'After', 'Change', '95% CI']
+    rows = []
+    for row in sweep.itertuples():
+        window = "Full history" if pd.isna(row.days) else f"±{int(row.days)} days"
+        rows.append(html.Tr([
+            html.Td(row.product.title()), html.Td(window),
+            html.Td(f"${row.before_mean:,.2f}"), html.Td(f"${row.after_mean:,.2f}"),
+            html.Td(f"{row.change_pct:+.1f}%"),
+            html.Td(f"{row.change_pct_low:+.1f}% to {row.change_pct_high:+.1f}%")
+        ]))
+    region_text = "all regions" if selected_region == 'all' else f"{selected_region.title()} region"
+    return html.Div([
+        html.P(f"{region_text}, around {pd.Timestamp(event):%b} {pd.Timestamp(event).day}, {pd.Timestamp(event).year}",
+               style={'fontWeight': 'bold'}),
+        html.Table([html.Thead(html.Tr([html.Th(name) for name in header])), html.Tbody(rows)],
+                   style={'width': '100%', 'textAlign': 'left'})
+    ])
+
+@memoize(version=data_version, maxsize=len(PRODUCTS))
+def rollup_store(product=DEFAULT_PRODUCT):
+    """A product's whole daily rollup as sent to the browser in CLIENTSIDE_MODE"""
+    payload = to_payload(product_data(product).rollup)
+    payload['event'] = PRICE_INCREASE_DATE.strftime('%Y-%m-%d')
+    payload['product'] = product
+    payload['version'] = product_data(product).version
+    return payload
+
+if CLIENTSIDE_MODE:
+    # Fill the store once per page load and product; region switches then
+    # stay in the browser. Refresh ticks re-send it only if new shards landed.
+    @app.callback(
+        Output('rollup-store', 'data'),
+        [Input('product-filter', 'value'),
+         Input('refresh-interval', 'n_intervals')],
+        State('rollup-store', 'data')
+    )
+    @metrics.instrument
+    def load_rollup_store(product, n_intervals=None, store=None):
+        product = selected_product(product)
+        if ctx.triggered_id == 'refresh-interval':
+            live.poll()
+        live.sync(product)
+        data = product_data(product)
+        if ctx.triggered_id == 'refresh-interval' and store and store.get('version') == data.version:
+            raise PreventUpdate
+        return rollup_store(product)
+
+    app.clientside_callback(
+        ClientsideFunction(namespace='soul_foods', function_name='switch_region'),
+        [Output('sales-chart', 'figure'),
+         Output('insights-content', 'children')],
+        [Input('region-filter', 'value'),
+         Input('event-date', 'date'),
+         Input('event-window', 'value'),
+         Input('date-range', 'start_date'),
+         Input('date-range', 'end_date'),
+         Input('granularity', 'value'),
+         Input('rollup-store', 'data')],
+        State('sales-chart', 'figure')
+    )
+else:
+    app.callback(
+        [Output('sales-chart', 'figure'),
+         Output('insights-content', 'children'),
+         Output('chart-state', 'data')],
+        [Input('region-filter', 'value'),
+         Input('sales-chart', 'relayoutData'),
+         Input('event-date', 'date'),
+         Input('event-window', 'value'),
+         Input('product-filter', 'value'),
+         Input('date-range', 'start_date'),
+         Input('date-range', 'end_date'),
+         Input('granularity', 'value')]
+    )(render_chart)
+
+    app.callback(
+        [Output('sales-chart', 'figure', allow_duplicate=True),
+         Output('insights-content', 'children', allow_duplicate=True),
+         Output('chart-state', 'data', allow_duplicate=True)],
+        Input('refresh-interval', 'n_intervals'),
+        State('chart-state', 'data'),
+        prevent_initial_call=True
+    )(refresh_chart)
+
+# The bootstrap sweep runs in the background in both modes; Run and Cancel
+# toggle while it is running
+app.callback(
+    Output('analysis-output', 'children'),
+    Input('analysis-run', 'n_clicks'),
+    [State('analysis-scope', 'value'),
+     State('region-filter', 'value'),
+     State('event-date', 'date'),
+     State('event-window', 'value'),
+     State('product-filter', 'value')],
+    background=True,
+    manager=background_manager,
+    running=[(Output('analysis-run', 'disabled'), True, False),
+             (Output('analysis-cancel', 'disabled'), False, True)],
+    cancel=[Input('analysis-cancel', 'n_clicks')],
+    progress=[Output('analysis-progress', 'value'), Output('analysis-progress', 'max')],
+    prevent_initial_call=True
+)(run_analysis)
+
+# Phase timings for every callback, as Prometheus text
+metrics.instrument_server(app.server)
+
+# Encode responses with orjson (DASH_JSON_ENGINE=json for the standard library)
+use_json_engine()
+
+# Compress callback responses, the layout and the bundles; registered after
+# the timer so compression counts towards the 'dispatch' phase.
+# DASH_RESPONSE_COMPRESSION=0 leaves it to a proxy.
+if COMPRESS_ENABLED:
+    compress_responses(app.server)
+
+@app.server.route('/metrics')
+def metrics_endpoint():
+    caches = {'chart_view': chart_view.cache, 'region_insights': region_insights.cache,
+              'rollup_store': rollup_store.cache}
+    return Response(metrics.render(caches), mimetype='text/plain; version=0.0.4')
+
+# Opt-in sampling profiler (DASH_PROFILE=1): GET /debug/profile?seconds=5
+# returns collapsed stacks for flame graph tools
+if PROFILE_ENABLED:
+    profiler = SamplingProfiler()
+
+    @app.server.route('/debug/profile')
+    def profile_dump():
+        seconds = min(float(request.args.get('seconds', 5)), 60)
+        return Response(profiler.dump(seconds), mimetype='text/plain')
+
+# Readiness probe: 200 once the dataset is loaded, 503 while it is still loading
+@app.server.route('/ready')
+def ready():
+    status = dataset.status()
+    return jsonify(status), 200 if status['ready'] else 503
 
 # Run the app
 if __name__ == '__main__':
+    dataset.warm_up()
     app.run_server(debug=True, host='0.0.0.0', port=8050)
@@ -1,12 +1,12 @@
 
 import dash
 from dash import dcc, html
-import pandas as pd
 import plotly.express as px
+from data_loader import load_sales_data
+from sales_stats import PRICE_INCREASE_DATE
 
 # Load the processed data
-df = pd.read_csv('processed_transaction_data.csv')
-df['date'] = pd.to_datetime(df['date'])
+df = load_sales_data()
 
 # Create daily sales summary
 daily_sales = df.groupby('date')['sales'].sum().reset_index()
@@ -26,7 +26,7 @@ fig = px.line(daily_sales,
               })
 
 # Add vertical line for price increase date
-price_increase_date = pd.to_datetime('2021-01-15')
+price_increase_date = PRICE_INCREASE_DATE
 fig.add_vline(x=price_increase_date.timestamp() * 1000,
               line_dash="dash", 
               line_color="red",
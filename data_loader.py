@@ -0,0 +1,463 @@
+"""
+Shared data loader for the Soul Foods dashboards
+
+The processed dataset is kept in two formats:
+- processed_transaction_data.csv: the text format produced by process_data.py
+- processed_transaction_data.feather: an uncompressed Arrow/Feather copy with a
+  typed date column and a dictionary-encoded (categorical) region column
+
+The Feather file is memory-mapped, so repeated loads skip text parsing and
+share the page cache between processes. It records the data_version() of
+the CSV it was built from, and is rebuilt whenever the CSV has changed since. Without pyarrow the loader falls back to the CSV.
+
+LazyDataset defers loading until the data is first needed (or a background
+warm-up thread finishes), so importing an app never blocks on parsing.
+
+Loaded frames are compacted in memory: region as a categorical (1-byte
+codes), date as an int32 day ordinal and sales as float32 whenever every
+value survives the round trip to the cent.
+
+ProductCatalog serves the product-partitioned store written by
+process_data.py --all-products (one processed file per product). Each
+product is loaded lazily from its own partition, so a query for one product
+never reads, or holds in memory, the rows of any other.
+
+New shards can be folded into a loaded dataset while the app runs
+(LazyDataset.extend, driven by live_refresh.py): only the new rows are
+grouped, and the updated aggregates are swapped in as a new Dataset.
+"""
+import copy
+import functools
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from downsample import ResampleCache
+from rollup import build_rollup, merge_rollup
+from sales_stats import PRICE_INCREASE_DATE, WindowIndex, price_change_stats
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+    feather = None
+
+CSV_FILE = 'processed_transaction_data.csv'
+FEATHER_FILE = 'processed_transaction_data.feather'
+PRODUCT_DIR = os.path.join('processed', 'products')
+DEFAULT_PRODUCT = 'pink morsel'
+# Schema metadata key holding the source CSV's data_version()
+VERSION_KEY = b'soul_foods_data_version'
+
+
+def columnar_path(csv_file=CSV_FILE):
+    """Return the Feather path that sits next to a processed CSV"""
+    return os.path.splitext(csv_file)[0] + '.feather'
+
+
+def product_slug(product):
+    """File-name form of a product name: 'pink morsel' -> 'pink_morsel'"""
+    return re.sub(r'[^a-z0-9]+', '_', product.lower()).strip('_')
+
+
+def product_path(product, store_dir=PRODUCT_DIR):
+    """Path of a product's processed CSV in the partitioned store"""
+    return os.path.join(store_dir, product_slug(product) + '.csv')
+
+
+def read_csv(csv_file=CSV_FILE):
+    """Parse the processed CSV into a typed frame"""
+    df = pd.read_csv(csv_file)
+    df['date'] = pd.to_datetime(df['date'])
+    df['region'] = df['region'].astype('category')
+    return df
+
+
+def write_columnar(df, path=FEATHER_FILE, version=None):
+    """Write a frame as uncompressed Feather so it can be memory-mapped
+
+    version (the data_version() of the source CSV) is kept in the schema
+    metadata, for is_fresh().
+    """
+    if feather is None:
+        raise ImportError("pyarrow is required for the columnar store")
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    if version is not None:
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}),
+                                               VERSION_KEY: version.encode()})
+    # A private temporary name, so concurrent writers never share a file
+    fd, tmp_file = tempfile.mkstemp(dir=os.path.dirname(path) or '.', suffix='.tmp')
+    os.close(fd)
+    os.chmod(tmp_file, 0o644)
+    try:
+        feather.write_feather(table, tmp_file, compression='uncompressed')
+        os.replace(tmp_file, path)
+    except BaseException:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+        raise
+
+
+def convert_csv(csv_file=CSV_FILE, path=None):
+    """Build the columnar copy of a processed CSV and return its path"""
+    path = path or columnar_path(csv_file)
+    # Read the version before the data: a CSV replaced mid-read then shows
+    # up as stale instead of being stamped with the new version
+    version = data_version(csv_file)
+    write_columnar(read_csv(csv_file), path, version)
+    return path
+
+
+def read_columnar(path=FEATHER_FILE):
+    """Memory-map a Feather file and return it as a DataFrame"""
+    table = feather.read_table(path, memory_map=True)
+    return table.to_pandas(split_blocks=True)
+
+
+def columnar_version(path):
+    """The CSV data_version() a columnar copy was built from (None if unknown)"""
+    try:
+        with pa.memory_map(path) as source:
+            metadata = pa.ipc.open_file(source).schema.metadata or {}
+    except (OSError, pa.ArrowInvalid):
+        return None
+    version = metadata.get(VERSION_KEY)
+    return version.decode() if version is not None else None
+
+
+def is_fresh(path, csv_file):
+    """True if the columnar copy exists and was built from the CSV as it is now"""
+    if not os.path.exists(path):
+        return False
+    if not os.path.exists(csv_file):
+        return True
+    return columnar_version(path) == data_version(csv_file)
+
+
+def data_version(csv_file=CSV_FILE):
+    """A cheap token that changes whenever the processed CSV is rewritten"""
+    try:
+        stat = os.stat(csv_file)
+    except FileNotFoundError:
+        return None
+    return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+
+def load_sales_data(csv_file=CSV_FILE, use_columnar=True):
+    """Load the processed sales data for the dashboards
+
+    Prefers the memory-mapped Feather copy and (re)builds it from the CSV
+    when missing or stale. Falls back to parsing the CSV when pyarrow is
+    not installed or the copy cannot be written.
+    """
+    if not use_columnar or feather is None:
+        return read_csv(csv_file)
+
+    path = columnar_path(csv_file)
+    if not is_fresh(path, csv_file):
+        version = data_version(csv_file)
+        df = read_csv(csv_file)
+        try:
+            write_columnar(df, path, version)
+        except OSError:
+            return df
+    return read_columnar(path)
+
+
+def to_day_ordinal(dates):
+    """Days since 1970-01-01 as int32"""
+    return dates.to_numpy().astype('datetime64[D]').astype(np.int32)
+
+
+def from_day_ordinal(days):
+    """Inverse of to_day_ordinal, as datetime64[ns]"""
+    return np.asarray(days).astype('datetime64[D]').astype('datetime64[ns]')
+
+
+def compact_sales(sales):
+    """Downcast sales to float32 if no value moves by half a cent or more"""
+    values = sales.to_numpy(dtype=np.float64)
+    compact = values.astype(np.float32)
+    if np.all(np.abs(compact.astype(np.float64) - values) < 0.005):
+        return compact
+    return values
+
+
+def compact_frame(df):
+    """Return the (sales, day, region) frame with the smallest lossless dtypes"""
+    return pd.DataFrame({
+        'sales': compact_sales(df['sales']),
+        'day': to_day_ordinal(df['date']),
+        'region': df['region'].astype('category')
+    })
+
+
+def text_frame_bytes(df):
+    """Deep bytes of df as read_csv + to_datetime would hold it, strings as Python objects
+
+    Categorical columns are counted as object-string columns from their
+    category counts, so no object column is built to measure them.
+    """
+    total = int(df.index.memory_usage(deep=True))
+    for name in df.columns:
+        column = df[name]
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            codes = column.cat.codes.to_numpy()
+            counts = np.bincount(codes[codes >= 0], minlength=len(column.cat.categories))
+            sizes = np.array([sys.getsizeof(category) for category in column.cat.categories], dtype=np.int64)
+            total += 8 * len(column) + int(counts @ sizes) + int((codes < 0).sum()) * sys.getsizeof(np.nan)
+        else:
+            total += int(column.memory_usage(index=False, deep=True))
+    return total
+
+
+def memory_report(before, after):
+    """Deep memory use of a loaded frame in its text representation and compacted, and the reduction"""
+    before_bytes = text_frame_bytes(before)
+    after_bytes = int(after.memory_usage(index=True, deep=True).sum())
+    return {
+        'before_bytes': before_bytes,
+        'after_bytes': after_bytes,
+        'reduction': before_bytes / after_bytes if after_bytes else None
+    }
+
+
+class Dataset:
+    """The aggregates built from the loaded sales frame
+
+    Every view is served from the aggregates, so the row-level frame is
+    compacted for the groupby and then released; memory reports what it
+    took against the text representation.
+    """
+
+    def __init__(self, df, version):
+        compact = compact_frame(df)
+        self.memory = memory_report(df, compact)
+        self.version = version
+        self.rollup = build_rollup(compact)
+        self.stats = price_change_stats(self.rollup)
+        self.windows = WindowIndex(self.rollup)
+        self.resampled = ResampleCache(self.rollup, [PRICE_INCREASE_DATE])
+        self.changes = []
+
+    def extend(self, df, version):
+        """A new Dataset with df's rows added to the aggregates (self is unchanged)
+
+        Only df is grouped; the window index and resample cache are rebuilt
+        from the merged daily rollup, whose size depends on the number of
+        days, not rows.
+        The bootstrap statistics resample every day, so they are rebuilt on
+        first use instead of here.
+        """
+        updated = copy.copy(self)
+        updated.version = version
+        first_date = pd.NaT
+        if len(df):
+            updated.rollup = merge_rollup(self.rollup, build_rollup(compact_frame(df)))
+            updated.__dict__.pop('stats', None)
+            updated.windows = WindowIndex(updated.rollup)
+            updated.resampled = ResampleCache(updated.rollup, [PRICE_INCREASE_DATE])
+            first_date = pd.Timestamp(df['date'].min())
+        updated.changes = self.changes + [(self.version, first_date)]
+        return updated
+
+    @functools.cached_property
+    def stats(self):
+        """Before/after statistics, built at load and rebuilt lazily after extend()"""
+        return price_change_stats(self.rollup)
+
+    def changed_since(self, version):
+        """Earliest date whose totals changed since version (NaT if none)
+
+        Raises KeyError when version is not an ancestor of this dataset.
+        """
+        if version == self.version:
+            return pd.NaT
+        for i, (previous, _) in enumerate(self.changes):
+            if previous == version:
+                return min((date for _, date in self.changes[i:] if pd.notna(date)), default=pd.NaT)
+        raise KeyError(version)
+
+
+class LazyDataset:
+    """Load the dataset on first use, at most once per CSV version, from any thread
+
+    get() blocks until the data is loaded; warm_up() starts loading in a
+    background thread so the first callback does not pay for it. status()
+    reports readiness for health checks. extend() folds in rows that arrive
+    later, before or after loading.
+
+    get() also compares the CSV's data_version (one stat call) with the one
+    it loaded: when the file has been rewritten, e.g. by process_data.py, it
+    is reloaded under a new version, which invalidates every cached view.
+    Rows folded in by extend() are dropped then, since the rewritten file
+    includes them. If a reload fails, the previous data keeps being served until
+    the file changes again.
+    """
+
+    def __init__(self, csv_file=CSV_FILE, use_columnar=True):
+        self.csv_file = csv_file
+        self.use_columnar = use_columnar
+        self.load_seconds = None
+        self.error = None
+        self._dataset = None
+        self._loaded_version = None
+        self._extra = []
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def ready(self):
+        return self._dataset is not None
+
+    @property
+    def version(self):
+        """Version of the loaded data, or None before loading"""
+        dataset = self._dataset
+        return dataset.version if dataset is not None else None
+
+    def stale(self):
+        """True if the CSV was rewritten after the loaded data was read"""
+        current = data_version(self.csv_file)
+        return self._dataset is not None and current is not None and current != self._loaded_version
+
+    def get(self):
+        """Return the loaded Dataset, loading (or reloading) it first if needed"""
+        dataset = self._dataset
+        if dataset is not None and not self.stale():
+            return dataset
+        with self._lock:
+            if self._dataset is None or self.stale():
+                start = time.perf_counter()
+                version = data_version(self.csv_file)
+                try:
+                    df = load_sales_data(self.csv_file, self.use_columnar)
+                    dataset = Dataset(df, version)
+                    for name, extra in self._extra:
+                        dataset = dataset.extend(extra, f"{dataset.version}+{name}")
+                    self._dataset = dataset
+                    self._loaded_version = version
+                    self._extra = []
+                    self.error = None
+                except Exception as e:
+                    self.error = f"{type(e).__name__}: {e}"
+                    if self._dataset is None:
+                        raise
+                    # Keep serving the previous data; retry once the file changes again
+                    self._loaded_version = version
+                finally:
+                    self.load_seconds = time.perf_counter() - start
+            return self._dataset
+
+    def extend(self, name, df):
+        """Fold the processed rows of a new shard into the data
+
+        If the data is loaded, an updated Dataset is built from just these
+        rows and swapped in; callbacks keep reading the previous one until
+        then. Otherwise the rows are held until it loads, and released then.
+        """
+        with self._lock:
+            if self._dataset is not None:
+                self._dataset = self._dataset.extend(df, f"{self._dataset.version}+{name}")
+            else:
+                self._extra.append((name, df))
+
+    def warm_up(self):
+        """Start loading in a daemon thread and return immediately"""
+        with self._lock:
+            if self._dataset is not None or self._thread is not None:
+                return self._thread
+            self._thread = threading.Thread(target=self._warm_up, name='dataset-warm-up', daemon=True)
+            self._thread.start()
+            return self._thread
+
+    def _warm_up(self):
+        try:
+            self.get()
+        except Exception:
+            pass  # recorded in self.error and retried on the next get()
+        finally:
+            self._thread = None
+
+    def status(self):
+        """Readiness details for a health-check endpoint"""
+        return {
+            'ready': self.ready,
+            'loading': self._thread is not None,
+            'load_seconds': self.load_seconds,
+            'version': self.version,
+            'memory': self._dataset.memory if self._dataset is not None else None,
+            'error': self.error
+        }
+
+
+class ProductCatalog:
+    """One LazyDataset per product, each backed by its own partition
+
+    The default product is served from the main processed CSV (kept current
+    by the incremental pipeline); every other product from its file in the
+    partitioned store. Datasets are created on first request, so products
+    that are never selected are never loaded.
+    """
+
+    def __init__(self, store_dir=PRODUCT_DIR, default_product=DEFAULT_PRODUCT,
+                 csv_file=CSV_FILE, use_columnar=True):
+        self.store_dir = store_dir
+        self.default_product = default_product
+        self.csv_file = csv_file
+        self.use_columnar = use_columnar
+        self._datasets = {}
+        self._lock = threading.Lock()
+
+    def path(self, product):
+        """The processed CSV holding one product's rows"""
+        if product == self.default_product:
+            return self.csv_file
+        return product_path(product, self.store_dir)
+
+    def products(self):
+        """The default product plus every product in the partitioned store, sorted"""
+        names = {self.default_product}
+        if os.path.isdir(self.store_dir):
+            names.update(os.path.splitext(name)[0].replace('_', ' ')
+                         for name in os.listdir(self.store_dir) if name.endswith('.csv'))
+        return sorted(names)
+
+    def __contains__(self, product):
+        """True if product is the default product or has a partition in the store"""
+        return product in self._datasets or product in self.products()
+
+    def dataset(self, product=None):
+        """The LazyDataset for a product (the default product if None)
+
+        Raises KeyError for a product the store does not hold, so names
+        coming from clients never create datasets.
+        """
+        product = product or self.default_product
+        dataset = self._datasets.get(product)
+        if dataset is None:
+            if product not in self.products():
+                raise KeyError(product)
+            with self._lock:
+                dataset = self._datasets.get(product)
+                if dataset is None:
+                    dataset = LazyDataset(self.path(product), self.use_columnar)
+                    self._datasets[product] = dataset
+        return dataset
+
+    def datasets(self):
+        """{product: LazyDataset} for every product requested so far"""
+        with self._lock:
+            return dict(self._datasets)
+
+    def version(self):
+        """A token covering the data versions of every loaded product"""
+        return tuple(sorted((product, dataset.version) for product, dataset in self.datasets().items()
+                            if dataset.ready))
@@ -0,0 +1,202 @@
+"""
+Shape-preserving downsampling for the sales time series
+
+Charts never need more points than they have horizontal pixels. The
+Largest-Triangle-Three-Buckets (LTTB) algorithm picks, from each bucket of
+the series, the point that forms the largest triangle with its neighbours,
+which keeps peaks, troughs and steps visible with a bounded point count.
+
+Series are split at breakpoints (such as the price increase) and each
+segment is downsampled on its own, so a step at a breakpoint is never
+averaged away.
+
+at_resolution() serves zoomable charts: it slices the requested window
+out of a sorted daily series and, for 'auto', picks the finest resolution
+(daily, weekly, monthly, quarterly) that fits the point budget, so every
+response is a small, bounded amount of data however long the history is.
+A fixed resolution can be asked for instead.
+
+ResampleCache holds every region's weekly, monthly and quarterly means,
+built in one vectorized pass when the data loads, so a coarse view is a
+lookup and a binary-search slice instead of a fresh resample.
+"""
+import numpy as np
+import pandas as pd
+
+from sales_stats import region_matrix
+
+# (pandas frequency, label), finest first
+RESOLUTIONS = [('D', 'daily'), ('W', 'weekly'), ('MS', 'monthly'), ('QS', 'quarterly')]
+FREQUENCIES = {label: freq for freq, label in RESOLUTIONS}
+# Average bucket length in days, to estimate a window's bucket count
+BUCKET_DAYS = {'W': 7, 'MS': 30.4, 'QS': 91.3}
+
+
+def lttb(x, y, n_out):
+    """Return the indices of n_out points chosen by LTTB (always including both ends)"""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if n_out >= n:
+        return np.arange(n)
+    if n_out < 3:
+        return np.array([0, n - 1][:max(n_out, 0)])
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    idx = np.empty(n_out, dtype=np.int64)
+    idx[0] = 0
+    idx[-1] = n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_start, next_end = edges[i + 1], edges[i + 2]
+        else:
+            next_start, next_end = n - 1, n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a])
+                      - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        idx[i + 1] = a
+    return idx
+
+
+def downsample_series(df, max_points, breakpoints=(), x='date', y='sales'):
+    """Reduce a sorted (date, sales) frame to about max_points rows
+
+    Points are shared between the segments on either side of each
+    breakpoint in proportion to their length; every segment keeps its first
+    and last point, so the series on both sides of a breakpoint is exact.
+    """
+    n = len(df)
+    if n <= max_points:
+        return df
+
+    xs = df[x].to_numpy()
+    cuts = split_at(xs, breakpoints)
+
+    x_values = xs.astype(np.int64) if np.issubdtype(xs.dtype, np.datetime64) else xs
+    y_values = df[y].to_numpy()
+    indices = []
+    for start, end in zip(cuts[:-1], cuts[1:]):
+        budget = max(2, (max_points * (end - start)) // n)
+        indices.append(start + lttb(x_values[start:end], y_values[start:end], budget))
+    return df.iloc[np.concatenate(indices)]
+
+
+def split_at(xs, breakpoints):
+    """Positions that cut a sorted array into segments at each breakpoint"""
+    n = len(xs)
+    cuts = [0]
+    for breakpoint in sorted(breakpoints):
+        position = int(np.searchsorted(xs, np.asarray(breakpoint, dtype=xs.dtype)))
+        if cuts[-1] < position < n:
+            cuts.append(position)
+    cuts.append(n)
+    return cuts
+
+
+def window(df, start=None, end=None, x='date'):
+    """Slice a frame sorted by x to [start, end] with binary search"""
+    xs = df[x].to_numpy()
+    lo = 0 if start is None else int(np.searchsorted(xs, np.asarray(pd.Timestamp(start), dtype=xs.dtype), 'left'))
+    hi = len(xs) if end is None else int(np.searchsorted(xs, np.asarray(pd.Timestamp(end), dtype=xs.dtype), 'right'))
+    return df.iloc[lo:hi]
+
+
+def resample_mean(df, freq, breakpoints=(), x='date', y='sales'):
+    """Average y per freq bucket, never letting a bucket straddle a breakpoint"""
+    xs = df[x].to_numpy()
+    cuts = split_at(xs, breakpoints)
+    parts = []
+    for start, end in zip(cuts[:-1], cuts[1:]):
+        segment = df.iloc[start:end].set_index(x)[y]
+        means = segment.resample(freq).mean().dropna()
+        # Label each bucket with its first real day so buckets stay ordered
+        firsts = segment.index.to_series().resample(freq).min().dropna()
+        parts.append(pd.DataFrame({x: firsts.loc[means.index].to_numpy(), y: means.to_numpy()}))
+    return pd.concat(parts, ignore_index=True)
+
+
+def bucket_keys(dates, freq):
+    """An integer per date that is equal for dates in the same freq bucket"""
+    if freq == 'W':
+        # Weeks end on Sunday (pandas 'W'); 1970-01-01 was a Thursday
+        return (dates.astype('datetime64[D]').astype(np.int64) + 3) // 7
+    months = dates.astype('datetime64[M]').astype(np.int64)
+    return months // 3 if freq == 'QS' else months
+
+
+class ResampleCache:
+    """Mean daily sales per bucket for every region at every coarse resolution
+
+    Buckets never straddle a breakpoint and are labelled with their first
+    day that has data, exactly as resample_mean() does. All regions and
+    buckets of one resolution come out of a single np.add.reduceat over
+    the (regions x days) matrix.
+    """
+
+    def __init__(self, rollup, breakpoints=(), x='date', y='sales'):
+        self.breakpoints = tuple(pd.Timestamp(b) for b in breakpoints)
+        regions, dates, values = region_matrix(rollup)
+        valid = ~np.isnan(values)
+        filled = np.where(valid, values, 0.0)
+        first_days = np.where(valid, dates.astype('datetime64[ns]').astype(np.int64), np.iinfo(np.int64).max)
+        segments = np.searchsorted(np.array(self.breakpoints, dtype='datetime64[ns]'),
+                                   dates.astype('datetime64[ns]'), 'right')
+
+        self.series = {}
+        for freq, label in RESOLUTIONS[1:]:
+            if not len(dates):
+                for region in regions:
+                    self.series[(region, label)] = pd.DataFrame({x: dates, y: np.empty(0)})
+                continue
+            keys = bucket_keys(dates, freq)
+            starts = np.flatnonzero(np.r_[True, (np.diff(keys) != 0) | (np.diff(segments) != 0)])
+            sums = np.add.reduceat(filled, starts, axis=1)
+            counts = np.add.reduceat(valid, starts, axis=1)
+            firsts = np.minimum.reduceat(first_days, starts, axis=1)
+            for i, region in enumerate(regions):
+                keep = counts[i] > 0
+                self.series[(region, label)] = pd.DataFrame({
+                    x: firsts[i, keep].astype('datetime64[ns]').astype(dates.dtype),
+                    y: sums[i, keep] / counts[i, keep]
+                })
+
+    def region(self, region):
+        """{resolution label: frame} for one region (empty for unknown regions)"""
+        return {label: series for (name, label), series in self.series.items() if name == region}
+
+
+def at_resolution(df, resolution='auto', start=None, end=None, max_points=500, breakpoints=(),
+                  resampled=None, x='date', y='sales'):
+    """Return (frame, resolution label, downsampled) for the window of a daily series
+
+    'auto' picks the finest resolution that fits max_points. Coarse frames
+    are sliced out of resampled ({label: frame}, from a ResampleCache built
+    with the same breakpoints) when given and resampled otherwise. A frame
+    still longer than max_points is reduced with LTTB (downsampled=True).
+    """
+    view = window(df, start, end, x)
+    if resolution == 'auto':
+        resolution = RESOLUTIONS[-1][1]
+        if len(view) <= max_points:
+            resolution = RESOLUTIONS[0][1]
+        else:
+            span_days = (view[x].iloc[-1] - view[x].iloc[0]) / np.timedelta64(1, 'D')
+            for freq, label in RESOLUTIONS[1:]:
+                if span_days / BUCKET_DAYS[freq] + len(breakpoints) + 1 <= max_points:
+                    resolution = label
+                    break
+
+    if resolution == RESOLUTIONS[0][1] or not len(view):
+        coarse = view
+    elif resampled is not None and resolution in resampled:
+        coarse = window(resampled[resolution], start, end, x)
+    else:
+        coarse = resample_mean(view, FREQUENCIES[resolution], breakpoints, x, y)
+    if len(coarse) <= max_points:
+        return coarse, resolution, False
+    return downsample_series(coarse, max_points, breakpoints, x, y), resolution, True
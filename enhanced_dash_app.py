@@ -3,11 +3,15 @@ import dash
 from dash import dcc, html, Input, Output
 import pandas as pd
 import plotly.express as px
+from callback_cache import memoize
+from data_loader import LazyDataset
+from rollup import lookup
+from sales_stats import PRICE_INCREASE_DATE
 import plotly.graph_objects as go
 
-# Load and prepare data
-df = pd.read_csv('processed_transaction_data.csv')
-df['date'] = pd.to_datetime(df['date'])
+# Load and prepare data lazily: the CSV is parsed (and the daily/region rollup
+# built) on first use, not at import time
+dataset = LazyDataset()
 
 # Create the Dash app
 app = dash.Dash(__name__)
@@ -116,15 +120,14 @@ app.layout = html.Div([
      Output('insights-content', 'children')],
     [Input('region-filter', 'value')]
 )
+@memoize(version=lambda: dataset.get().version, maxsize=64)
 def update_chart(selected_region):
-    # Filter data based on selection
+    # Look up the precomputed daily series for the selection
+    filtered_df = lookup(dataset.get().rollup, selected_region)
     if selected_region == 'all':
-        filtered_df = df.groupby('date')['sales'].sum().reset_index()
         title_suffix = "All Regions"
         region_text = "all regions combined"
     else:
-        region_data = df[df['region'] == selected_region]
-        filtered_df = region_data.groupby('date')['sales'].sum().reset_index()
         title_suffix = f"{selected_region.title()} Region"
         region_text = f"the {selected_region} region"
     
@@ -136,7 +139,7 @@ def update_chart(selected_region):
                   labels={'date': 'Date', 'sales': 'Total Daily Sales ($)'})
     
     # Add price increase line
-    price_increase_date = pd.to_datetime('2021-01-15')
+    price_increase_date = PRICE_INCREASE_DATE
     fig.add_vline(x=price_increase_date.timestamp() * 1000,
                   line_dash="dash", 
                   line_color="red",
@@ -197,4 +200,5 @@ def update_chart(selected_region):
 
 # Run the app
 if __name__ == '__main__':
+    dataset.warm_up()
     app.run_server(debug=True, host='0.0.0.0', port=8050)
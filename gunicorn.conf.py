@@ -0,0 +1,20 @@
+"""
+Gunicorn settings for the Soul Foods dashboard (see wsgi.py)
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get('BIND', '0.0.0.0:8050')
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('THREADS', 1))
+
+# Load the app (and the dataset) in the master before forking workers
+preload_app = True
+
+# Share memoized callback results between workers unless configured otherwise.
+# The default is private to the user running the server, not the shared /tmp.
+cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache')
+raw_env = ['DASH_CACHE_DIR=' + os.environ.get('DASH_CACHE_DIR', os.path.join(cache_home, 'soul-foods', 'callbacks'))]
+
+timeout = 30
+accesslog = '-'
@@ -0,0 +1,221 @@
+"""
+Hot-path timing instrumentation for the dashboard callbacks
+
+Callbacks wrapped with metrics.instrument record their total time and
+outcome (ok, prevented, error); metrics.phase('name') blocks inside them,
+including in helpers they call, record the time of each step under the
+running callback. metrics.instrument_server also times every
+/_dash-update-component request and records what is left after the
+callback itself as the 'dispatch' phase: Dash's request parsing, the
+JSON encoding of the outputs and the response compression.
+
+Timings are kept as fixed-bucket histograms (a few integer increments per
+observation) and rendered as Prometheus text. Set DASH_METRICS=0 to turn
+recording off.
+
+The sampling profiler is opt-in (DASH_PROFILE=1): while a dump is
+requested, it samples every thread's Python stack at a fixed interval and
+returns the counts in the collapsed format used by flame graph tools. It
+costs nothing when no dump is running.
+"""
+import bisect
+import contextvars
+import functools
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from dash.exceptions import PreventUpdate
+
+ENABLED = os.environ.get('DASH_METRICS', '1') != '0'
+PROFILE_ENABLED = os.environ.get('DASH_PROFILE') == '1'
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+PROFILE_INTERVAL = 0.005
+UPDATE_PATH = '/_dash-update-component'
+
+_callback = contextvars.ContextVar('callback', default='none')
+
+
+class Histogram:
+    """Observation count, sum and per-bucket counts for one timing series"""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self):
+        """(le, cumulative count) pairs, ending with +Inf"""
+        total = 0
+        pairs = []
+        for le, count in zip([*map(repr, self.buckets), '+Inf'], self.counts):
+            total += count
+            pairs.append((le, total))
+        return pairs
+
+
+class Metrics:
+    """Thread-safe registry of callback phase timings and outcomes"""
+
+    def __init__(self, enabled=ENABLED, buckets=BUCKETS):
+        self.enabled = enabled
+        self.buckets = buckets
+        self._phases = {}
+        self._outcomes = Counter()
+        self._lock = threading.Lock()
+        self._last = threading.local()
+
+    def observe(self, callback, phase, seconds):
+        """Record one timing for (callback, phase)"""
+        with self._lock:
+            histogram = self._phases.get((callback, phase))
+            if histogram is None:
+                histogram = self._phases[(callback, phase)] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    @contextmanager
+    def phase(self, name):
+        """Time a block as phase name of the callback currently running"""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(_callback.get(), name, time.perf_counter() - start)
+
+    def instrument(self, func=None, name=None):
+        """Decorate a callback to record its total time, outcome and the phases inside it"""
+        if func is None:
+            return functools.partial(self.instrument, name=name)
+        name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not self.enabled:
+                return func(*args, **kwargs)
+            token = _callback.set(name)
+            outcome = 'error'
+            start = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+                outcome = 'ok'
+                return result
+            except PreventUpdate:
+                outcome = 'prevented'
+                raise
+            finally:
+                elapsed = time.perf_counter() - start
+                _callback.reset(token)
+                self.observe(name, 'total', elapsed)
+                with self._lock:
+                    self._outcomes[(name, outcome)] += 1
+                self._last.callback = (name, elapsed)
+        return wrapper
+
+    def instrument_server(self, server, path=UPDATE_PATH):
+        """Time callback requests on a Flask server, attributing the overhead to 'dispatch'"""
+        @server.before_request
+        def start_timer():
+            self._last.callback = None
+            self._last.start = time.perf_counter()
+
+        @server.after_request
+        def stop_timer(response):
+            from flask import request
+
+            start = getattr(self._last, 'start', None)
+            callback = getattr(self._last, 'callback', None)
+            if self.enabled and start is not None and request.path.endswith(path) and callback is not None:
+                name, callback_seconds = callback
+                self.observe(name, 'dispatch', max(time.perf_counter() - start - callback_seconds, 0.0))
+            self._last.start = None
+            return response
+
+    def reset(self):
+        with self._lock:
+            self._phases.clear()
+            self._outcomes.clear()
+
+    def render(self, caches=None):
+        """Prometheus text exposition of every series (and memoize cache counters)"""
+        with self._lock:
+            phases = sorted(self._phases.items())
+            outcomes = sorted(self._outcomes.items())
+            lines = [
+                '# HELP dash_callback_phase_seconds Time spent in each phase of a callback.',
+                '# TYPE dash_callback_phase_seconds histogram'
+            ]
+            for (callback, phase), histogram in phases:
+                labels = f'callback="{callback}",phase="{phase}"'
+                for le, count in histogram.cumulative():
+                    lines.append(f'dash_callback_phase_seconds_bucket{{{labels},le="{le}"}} {count}')
+                lines.append(f'dash_callback_phase_seconds_sum{{{labels}}} {histogram.sum!r}')
+                lines.append(f'dash_callback_phase_seconds_count{{{labels}}} {histogram.count}')
+
+        lines += ['# HELP dash_callback_calls_total Callback calls by outcome.',
+                  '# TYPE dash_callback_calls_total counter']
+        lines += [f'dash_callback_calls_total{{callback="{callback}",outcome="{outcome}"}} {count}'
+                  for (callback, outcome), count in outcomes]
+
+        if caches:
+            infos = sorted((name, cache.info()) for name, cache in caches.items())
+            for metric, key, kind, text in [
+                ('dash_cache_hits_total', 'hits', 'counter', 'Memoized view cache hits.'),
+                ('dash_cache_misses_total', 'misses', 'counter', 'Memoized view cache misses.'),
+                ('dash_cache_entries', 'size', 'gauge', 'Entries currently cached.'),
+            ]:
+                lines += [f'# HELP {metric} {text}', f'# TYPE {metric} {kind}']
+                lines += [f'{metric}{{cache="{name}"}} {info[key]}' for name, info in infos]
+        return '\n'.join(lines) + '\n'
+
+
+def frame_name(frame):
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+def collapse(frame):
+    """A stack as 'outermost;...;innermost' frame names"""
+    names = []
+    while frame is not None:
+        names.append(frame_name(frame))
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class SamplingProfiler:
+    """Samples the Python stacks of every other thread at a fixed interval"""
+
+    def __init__(self, interval=PROFILE_INTERVAL):
+        self.interval = interval
+
+    def sample(self, seconds):
+        """Counter of collapsed stacks seen over the next seconds"""
+        stacks = Counter()
+        me = threading.get_ident()
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id != me:
+                    stacks[collapse(frame)] += 1
+            time.sleep(self.interval)
+        return stacks
+
+    def dump(self, seconds):
+        """Sample for seconds and return 'stack count' lines, most frequent first"""
+        stacks = self.sample(seconds)
+        return ''.join(f'{stack} {count}\n' for stack, count in stacks.most_common())
+
+
+metrics = Metrics()
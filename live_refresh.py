@@ -0,0 +1,104 @@
+"""
+Live refresh: fold newly landed raw shards into the running dashboard
+
+LiveRefresher polls data/ for daily_sales_data_*.csv shards that the
+processed data does not cover yet. Each new shard is read once, chunk by
+chunk, split by product, and its rows are folded into every product dataset
+the app has opened (LazyDataset.extend). Only the new rows are grouped, so
+the cost of a refresh follows the size of the shard, not of the history,
+and the updated aggregates replace the old ones in one swap: there is no
+reload and no downtime.
+
+The processed data is taken to cover the shards in the pipeline manifest
+(processed/manifest.json) or, without one, every shard present at startup.
+Shards that are modified in place are not picked up; rerun
+process_data.py for those.
+"""
+import os
+import threading
+import time
+
+import pandas as pd
+
+import process_data
+
+REFRESH_SECONDS = float(os.environ.get('DASH_REFRESH_SECONDS', 30))
+
+
+def covered_shards(data_dir=process_data.DATA_DIR, manifest_file=process_data.MANIFEST_FILE):
+    """Names of the shards already in the processed data"""
+    output = process_data.load_manifest(manifest_file).get('output')
+    if output:
+        return set(output['shards'])
+    return {os.path.basename(path) for path in process_data.find_shards(data_dir)}
+
+
+def read_shard_products(path, products, chunk_size=process_data.CHUNK_SIZE):
+    """{product: processed rows} for one shard, reading it once for all products"""
+    parts = {product: [] for product in products}
+    for chunk in pd.read_csv(path, usecols=process_data.RAW_COLUMNS, chunksize=chunk_size):
+        for product, rows in process_data.split_products(chunk, parts):
+            parts[product].append(rows)
+
+    frames = {}
+    for product, chunks in parts.items():
+        frame = (pd.concat(chunks, ignore_index=True) if chunks
+                 else pd.DataFrame(columns=process_data.OUTPUT_COLUMNS))
+        frame['date'] = pd.to_datetime(frame['date'])
+        frame['region'] = frame['region'].astype('category')
+        frames[product] = frame
+    return frames
+
+
+class LiveRefresher:
+    """Watches a data directory and folds new shards into a ProductCatalog
+
+    poll() is cheap to call from every request: it scans the directory at
+    most once per min_interval seconds and never blocks behind a refresh
+    already running in another thread.
+    """
+
+    def __init__(self, catalog, data_dir=process_data.DATA_DIR, known=None, min_interval=REFRESH_SECONDS):
+        self.catalog = catalog
+        self.data_dir = data_dir
+        self.known = covered_shards(data_dir) if known is None else set(known)
+        self.min_interval = min_interval
+        self.shards = []
+        self.folded = {}
+        self._lock = threading.Lock()
+        self._last_poll = None
+
+    def poll(self, force=False):
+        """Fold any new shards into every open product; return how many were new"""
+        now = time.monotonic()
+        if not force and self._last_poll is not None and now - self._last_poll < self.min_interval:
+            return 0
+        if not self._lock.acquire(blocking=False):
+            return 0
+        try:
+            self._last_poll = now
+            new = [path for path in process_data.find_shards(self.data_dir)
+                   if os.path.basename(path) not in self.known]
+            self.known.update(os.path.basename(path) for path in new)
+            self.shards.extend(new)
+            self._fold(list(self.catalog.datasets()))
+            return len(new)
+        finally:
+            self._lock.release()
+
+    def sync(self, product):
+        """Fold shards seen so far into a product opened after they landed"""
+        if self.folded.get(product, 0) < len(self.shards):
+            with self._lock:
+                self._fold([product])
+
+    def _fold(self, products):
+        if not products:
+            return
+        for index in range(min(self.folded.get(product, 0) for product in products), len(self.shards)):
+            path = self.shards[index]
+            pending = [product for product in products if self.folded.get(product, 0) <= index]
+            rows = read_shard_products(path, pending)
+            for product in pending:
+                self.catalog.dataset(product).extend(os.path.basename(path), rows[product])
+                self.folded[product] = index + 1
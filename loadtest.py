@@ -0,0 +1,206 @@
+"""
+Headless load tester for the dash_app callbacks
+
+Drives the chart callback the way the browser does, with POSTs to Dash's
+/_dash-update-component endpoint, but in-process through app.server's
+test client: no browser, no network, no running server. A thread pool sends
+the requests concurrently, with the region-filter values drawn from a
+configurable mix, and each worker count is reported as p50/p95/p99 latency
+and throughput.
+
+    python loadtest.py
+    python loadtest.py --workers 1 2 4 8 --requests 1000 --mix all=2,north=1,south=1
+    python loadtest.py --cold      # clear the callback caches before every request
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+REGIONS = ['all', 'north', 'south', 'east', 'west']
+DEFAULT_MIX = ','.join(f'{region}=1' for region in REGIONS)
+WORKERS = [1, 2, 4, 8]
+REQUESTS = 500
+WARMUP = 20
+ENDPOINT = '/_dash-update-component'
+
+
+def parse_mix(text):
+    """'all=2,north=1' -> {'all': 2.0, 'north': 1.0}; a bare name has weight 1"""
+    mix = {}
+    for part in text.split(','):
+        region, _, weight = part.strip().partition('=')
+        if region:
+            mix[region] = float(weight) if weight else 1.0
+    if not mix or any(weight < 0 for weight in mix.values()) or not sum(mix.values()):
+        raise ValueError(f"Invalid region mix: {text!r}")
+    return mix
+
+
+def request_plan(mix, n_requests, seed=0):
+    """The region of every request, drawn from the mix with a fixed seed"""
+    rng = random.Random(seed)
+    return rng.choices(list(mix), weights=list(mix.values()), k=n_requests)
+
+
+def find_callback(client, input_id='region-filter', input_property='value'):
+    """The registered server callback with input_id.input_property among its inputs"""
+    for dependency in client.get('/_dash-dependencies').get_json():
+        if dependency.get('clientside_function'):
+            continue
+        if {'id': input_id, 'property': input_property} in dependency['inputs']:
+            return dependency
+    raise LookupError(f"No server callback takes {input_id}.{input_property}")
+
+
+def initial_value(layout, component_id, prop):
+    """A property's value as declared in the layout (None if unset or missing)"""
+    try:
+        value = getattr(layout[component_id], prop, None)
+    except KeyError:
+        return None
+    return value if value is None or isinstance(value, (str, int, float, bool, list, dict)) else str(value)
+
+
+def build_payload(dependency, layout, changed_id, value, input_property='value'):
+    """Request body for one callback call with changed_id set to value
+
+    Every other input takes its initial value from the layout, as on first
+    page load.
+    """
+    output = dependency['output']
+    outputs = []
+    for spec in output.strip('.').split('...'):
+        component_id, prop = spec.rsplit('.', 1)
+        outputs.append({'id': component_id, 'property': prop})
+
+    inputs = []
+    for spec in dependency['inputs']:
+        if spec['id'] == changed_id and spec['property'] == input_property:
+            inputs.append(dict(spec, value=value))
+        else:
+            inputs.append(dict(spec, value=initial_value(layout, spec['id'], spec['property'])))
+    return {
+        'output': output,
+        'outputs': outputs if output.startswith('..') else outputs[0],
+        'inputs': inputs,
+        'changedPropIds': [f'{changed_id}.{input_property}'],
+        'state': [dict(spec, value=initial_value(layout, spec['id'], spec['property']))
+                  for spec in dependency['state']]
+    }
+
+
+def percentiles(latencies):
+    """p50/p95/p99 and mean of a list of latencies, in milliseconds"""
+    if not latencies:
+        return {'p50_ms': None, 'p95_ms': None, 'p99_ms': None, 'mean_ms': None}
+    values = np.asarray(latencies) * 1000
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {'p50_ms': float(p50), 'p95_ms': float(p95), 'p99_ms': float(p99), 'mean_ms': float(values.mean())}
+
+
+def run_load(server, payloads, workers, before_request=None):
+    """POST every payload with a pool of workers threads; return latencies, errors and wall time
+
+    Each thread uses its own test client. before_request, if given, runs
+    ahead of every request (outside the timed section).
+    """
+    local = threading.local()
+
+    def send(payload):
+        client = getattr(local, 'client', None)
+        if client is None:
+            client = local.client = server.test_client()
+        if before_request is not None:
+            before_request()
+        start = time.perf_counter()
+        response = client.post(ENDPOINT, data=payload, content_type='application/json')
+        latency = time.perf_counter() - start
+        return latency, response.status_code in (200, 204)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(send, payloads))
+    elapsed = time.perf_counter() - start
+
+    return {
+        'latencies': [latency for latency, _ in results],
+        'errors': sum(1 for _, ok in results if not ok),
+        'seconds': elapsed
+    }
+
+
+def load_test(app, mix, workers=WORKERS, n_requests=REQUESTS, seed=0, cold=False,
+              caches=(), warmup=WARMUP, changed_id='region-filter'):
+    """Run the same request plan at every worker count and return one summary per count
+
+    cold=True clears every cache in caches before each request, so every
+    request runs the callback body instead of a cache lookup.
+    """
+    client = app.server.test_client()
+    dependency = find_callback(client, changed_id)
+    layout = app.layout() if callable(app.layout) else app.layout
+    encoded = {region: json.dumps(build_payload(dependency, layout, changed_id, region))
+               for region in mix}
+    plan = [encoded[region] for region in request_plan(mix, n_requests, seed)]
+
+    def clear_caches():
+        for cache in caches:
+            cache.clear()
+
+    # Load the data and fill the caches before anything is timed
+    run_load(app.server, list(encoded.values()) * max(1, warmup // len(encoded)), 1)
+
+    summaries = []
+    for count in workers:
+        result = run_load(app.server, plan, count, clear_caches if cold else None)
+        summaries.append({
+            'workers': count,
+            'requests': len(plan),
+            'errors': result['errors'],
+            'seconds': result['seconds'],
+            'throughput_rps': len(plan) / result['seconds'] if result['seconds'] > 0 else float('inf'),
+            **percentiles(result['latencies'])
+        })
+    return summaries
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the dash_app chart callback in-process")
+    parser.add_argument('--workers', type=int, nargs='+', default=WORKERS,
+                        help="Concurrent client threads to try")
+    parser.add_argument('--requests', type=int, default=REQUESTS,
+                        help="Requests per worker count")
+    parser.add_argument('--mix', default=DEFAULT_MIX,
+                        help="Weighted region-filter values, e.g. all=2,north=1")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--cold', action='store_true',
+                        help="Clear the callback caches before every request")
+    parser.add_argument('--json', metavar='PATH', help="Also write the summaries to PATH as JSON")
+    args = parser.parse_args(argv)
+
+    import dash_app
+
+    mix = parse_mix(args.mix)
+    print(f"🚦 {args.requests} requests per run, mix {args.mix}, {'cold' if args.cold else 'warm'} caches")
+    summaries = load_test(dash_app.app, mix, args.workers, args.requests, args.seed, args.cold,
+                          caches=[dash_app.chart_view.cache, dash_app.region_insights.cache])
+
+    print(f"{'workers':>8} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for summary in summaries:
+        print(f"{summary['workers']:>8} {summary['throughput_rps']:>9.1f} {summary['p50_ms']:>9.2f} "
+              f"{summary['p95_ms']:>9.2f} {summary['p99_ms']:>9.2f} {summary['errors']:>7}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'mix': mix, 'cold': args.cold, 'results': summaries}, f, indent=2)
+        print(f"💾 Results saved to {args.json}")
+    return summaries
+
+
+if __name__ == '__main__':
+    main()
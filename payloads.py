@@ -0,0 +1,106 @@
+"""
+Response payloads: JSON encoding and compression for the Flask server
+
+Dash encodes the layout and every callback response with plotly's
+to_json_plotly. orjson encodes a chart Patch 2.5-5x faster than the
+standard library (numbers in README.md, measured with benchmark.py), so
+use_json_engine() pins plotly to it at startup. Without orjson it falls back
+to the standard library and logs a warning, so the slow path is never taken
+silently. DASH_JSON_ENGINE=json opts out.
+
+compress_responses() gzips (or, with the brotli package, brotli-encodes)
+JSON, HTML, CSS and JavaScript responses for clients that accept it:
+callback payloads, the layout, the index page and the component bundles.
+Callback responses are compressed at a low level, which gets most of the
+saving for a fraction of the time; bundles are fingerprinted and immutable,
+so they are compressed once at the highest level and kept in a small LRU.
+Dash's own compress option (DASH_COMPRESS=1) does the same through
+flask-compress; this needs no extra package. Set DASH_RESPONSE_COMPRESSION=0
+when a proxy in front of the app already compresses.
+"""
+import gzip
+import logging
+import os
+
+import plotly.io.json as plotly_json
+
+from callback_cache import LRUCache
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+JSON_ENGINE = os.environ.get('DASH_JSON_ENGINE', 'orjson')
+COMPRESS_ENABLED = os.environ.get('DASH_RESPONSE_COMPRESSION', '1') != '0'
+COMPRESS_LEVEL = int(os.environ.get('DASH_COMPRESS_LEVEL', 1))
+STATIC_LEVEL = 9
+# Below this many bytes the headers outweigh the saving
+MIN_SIZE = 500
+COMPRESSIBLE = {'application/json', 'application/javascript', 'text/javascript', 'text/html', 'text/css',
+                'text/plain'}
+STATIC_PREFIX = '/_dash-component-suites/'
+STATIC_ENTRIES = 64
+
+logger = logging.getLogger(__name__)
+
+
+def use_json_engine(engine=JSON_ENGINE):
+    """Make plotly (and so Dash) encode with engine ('orjson' or 'json') and return the engine used
+
+    Falls back to 'json', with a warning, when orjson is not installed.
+    """
+    if engine == 'orjson' and orjson is None:
+        logger.warning("orjson is not installed; encoding responses with the slower standard library "
+                       "json (pip install orjson, or set DASH_JSON_ENGINE=json)")
+        engine = 'json'
+    plotly_json.config.default_engine = engine
+    return engine
+
+
+def encodings():
+    """Content encodings this server can produce, in order of preference"""
+    return ['br', 'gzip'] if brotli is not None else ['gzip']
+
+
+def compress(data, encoding, level=COMPRESS_LEVEL):
+    """data compressed with a Content-Encoding from encodings()"""
+    if encoding == 'br':
+        # Brotli quality runs 0-11; scale the gzip level onto it
+        return brotli.compress(data, quality=min(level + 1, 11))
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def compress_responses(server, level=COMPRESS_LEVEL, min_size=MIN_SIZE):
+    """Compress compressible responses of a Flask server for clients that accept it"""
+    static = LRUCache(STATIC_ENTRIES)
+
+    @server.after_request
+    def compress_response(response):
+        from flask import request
+
+        if (response.direct_passthrough or response.is_streamed or response.status_code != 200
+                or 'Content-Encoding' in response.headers or response.mimetype not in COMPRESSIBLE):
+            return response
+        response.vary.add('Accept-Encoding')
+        encoding = request.accept_encodings.best_match(encodings())
+        data = response.get_data()
+        if encoding is None or len(data) < min_size:
+            return response
+
+        if request.path.startswith(STATIC_PREFIX):
+            key = (request.full_path, encoding)
+            body = static.get(key)
+            if body is None:
+                body = compress(data, encoding, STATIC_LEVEL)
+                static.set(key, body)
+        else:
+            body = compress(data, encoding, level)
+        response.set_data(body)
+        response.headers['Content-Encoding'] = encoding
+        return response
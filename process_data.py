@@ -0,0 +1,399 @@
+"""
+Data processing pipeline for Soul Foods Pink Morsel sales
+
+Builds processed_transaction_data.csv (sales, date, region) from the raw
+data/daily_sales_data_*.csv shards. Shards are streamed in fixed-size
+chunks, so peak memory depends on the chunk size and not on the input size.
+Shards can also be spread over a process pool, one worker per core; the
+merged output is byte-identical to a single-process run.
+
+Incremental runs keep a manifest of every processed shard (size, mtime and
+content hash) next to one partition file per shard, so a rerun only parses
+new or modified shards.
+
+--all-products also splits the raw data into a product-partitioned store,
+one processed file per product, in a single pass over the shards.
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+import data_loader
+
+DATA_DIR = 'data'
+SHARD_PATTERN = 'daily_sales_data_*.csv'
+OUTPUT_FILE = 'processed_transaction_data.csv'
+PARTITION_DIR = os.path.join('processed', 'partitions')
+MANIFEST_FILE = os.path.join('processed', 'manifest.json')
+PRODUCT = 'pink morsel'
+CHUNK_SIZE = 100_000
+
+RAW_COLUMNS = ['product', 'price', 'quantity', 'date', 'region']
+OUTPUT_COLUMNS = ['sales', 'date', 'region']
+
+
+def shard_sort_key(path):
+    """Sort shards by their numeric suffix so _2 comes before _10"""
+    match = re.search(r'(\d+)\.csv$', os.path.basename(path))
+    return (int(match.group(1)) if match else -1, os.path.basename(path))
+
+
+def find_shards(data_dir=DATA_DIR, pattern=SHARD_PATTERN):
+    """Return the raw shard paths in deterministic order"""
+    return sorted(glob.glob(os.path.join(data_dir, pattern)), key=shard_sort_key)
+
+
+def parse_price(prices):
+    """Turn '$3.00' style strings into floats without a Python loop"""
+    cleaned = prices.str.replace('$', '', regex=False).str.replace(',', '', regex=False)
+    return pd.to_numeric(cleaned, errors='coerce')
+
+
+def transform_chunk(chunk, product=PRODUCT):
+    """Filter a raw chunk to one product and compute sales = price x quantity"""
+    chunk = chunk[chunk['product'] == product]
+    sales = parse_price(chunk['price']) * chunk['quantity']
+    return pd.DataFrame({
+        'sales': sales,
+        'date': chunk['date'],
+        'region': chunk['region']
+    })[OUTPUT_COLUMNS]
+
+
+def split_products(chunk, products=None):
+    """Yield (product, processed rows) for each product in a raw chunk, in first-seen row order"""
+    sales = parse_price(chunk['price']) * chunk['quantity']
+    processed = pd.DataFrame({
+        'sales': sales,
+        'date': chunk['date'],
+        'region': chunk['region']
+    })[OUTPUT_COLUMNS]
+    for product, rows in processed.groupby(chunk['product'], sort=True):
+        if products is None or product in products:
+            yield product, rows
+
+
+def iter_shard(path, product=PRODUCT, chunk_size=CHUNK_SIZE):
+    """Yield (raw_row_count, processed_chunk) for one shard"""
+    reader = pd.read_csv(path, usecols=RAW_COLUMNS, chunksize=chunk_size)
+    for chunk in reader:
+        yield len(chunk), transform_chunk(chunk, product)
+
+
+def process_shard(path, writer, product=PRODUCT, chunk_size=CHUNK_SIZE):
+    """Stream one shard into an open output file, returning (rows_read, rows_written)"""
+    rows_read = 0
+    rows_written = 0
+    for raw_rows, processed in iter_shard(path, product, chunk_size):
+        processed.to_csv(writer, header=False, index=False)
+        rows_read += raw_rows
+        rows_written += len(processed)
+    return rows_read, rows_written
+
+
+def process_shard_to_file(path, part_file, product=PRODUCT, chunk_size=CHUNK_SIZE):
+    """Process one shard into its own headerless part file (process pool entry point)"""
+    with open(part_file, 'w', newline='') as writer:
+        return process_shard(path, writer, product, chunk_size)
+
+
+def process_shards_to_files(shards, part_files, product=PRODUCT, chunk_size=CHUNK_SIZE, workers=1):
+    """Process each shard into its matching part file, returning (rows_read, rows_written) per shard"""
+    if workers > 1 and len(shards) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(process_shard_to_file, shards, part_files,
+                                 [product] * len(shards), [chunk_size] * len(shards)))
+    return [process_shard_to_file(path, part_file, product, chunk_size)
+            for path, part_file in zip(shards, part_files)]
+
+
+def append_parts(part_files, writer):
+    """Copy headerless part files into writer in order"""
+    for part_file in part_files:
+        with open(part_file, 'r', newline='') as part:
+            shutil.copyfileobj(part, writer)
+
+
+def process_shards_parallel(shards, writer, product=PRODUCT, chunk_size=CHUNK_SIZE, workers=None):
+    """Process shards in a process pool and merge their parts into writer in shard order
+
+    Returns a list of (rows_read, rows_written) per shard.
+    """
+    part_dir = tempfile.mkdtemp(prefix='shards_')
+    try:
+        part_files = [os.path.join(part_dir, f'part_{i:06d}.csv') for i in range(len(shards))]
+        shard_stats = process_shards_to_files(shards, part_files, product, chunk_size,
+                                              workers or os.cpu_count() or 1)
+        append_parts(part_files, writer)
+    finally:
+        shutil.rmtree(part_dir, ignore_errors=True)
+    return shard_stats
+
+
+def run_pipeline(data_dir=DATA_DIR, output_file=OUTPUT_FILE, product=PRODUCT,
+                 chunk_size=CHUNK_SIZE, shards=None, workers=1):
+    """Process every shard into output_file and return throughput stats
+
+    workers=1 runs in this process; workers=None uses one worker per core.
+    The output is written to a temporary file and moved into place once
+    complete, so readers never see a half-written dataset.
+    """
+    if shards is None:
+        shards = find_shards(data_dir)
+    if not shards:
+        raise FileNotFoundError(f"No shards matching {SHARD_PATTERN} in {data_dir}")
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(shards)))
+
+    start = time.perf_counter()
+    tmp_file = output_file + '.tmp'
+    with open(tmp_file, 'w', newline='') as writer:
+        writer.write(','.join(OUTPUT_COLUMNS) + '\n')
+        if workers > 1:
+            shard_stats = process_shards_parallel(shards, writer, product, chunk_size, workers)
+        else:
+            shard_stats = [process_shard(path, writer, product, chunk_size) for path in shards]
+    os.replace(tmp_file, output_file)
+    elapsed = time.perf_counter() - start
+
+    rows_read = sum(read for read, _ in shard_stats)
+    rows_written = sum(written for _, written in shard_stats)
+    return {
+        'shards': len(shards),
+        'workers': workers,
+        'rows_read': rows_read,
+        'rows_written': rows_written,
+        'seconds': elapsed,
+        'rows_per_sec': rows_read / elapsed if elapsed > 0 else float('inf')
+    }
+
+
+def file_hash(path, block_size=1 << 20):
+    """SHA-256 of a file's contents, read in blocks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_manifest(manifest_file=MANIFEST_FILE):
+    """Load the shard manifest, or an empty one if none exists yet"""
+    if not os.path.exists(manifest_file):
+        return {'shards': {}, 'output': None}
+    with open(manifest_file, 'r') as f:
+        return json.load(f)
+
+
+def save_manifest(manifest, manifest_file=MANIFEST_FILE):
+    """Write the manifest atomically"""
+    os.makedirs(os.path.dirname(manifest_file) or '.', exist_ok=True)
+    tmp_file = manifest_file + '.tmp'
+    with open(tmp_file, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_file, manifest_file)
+
+
+def shard_changed(path, entry):
+    """Return (changed, sha256) for a shard against its manifest entry
+
+    Size and mtime are checked first; the content hash is only computed
+    when they differ, so untouched shards are never read.
+    """
+    stat = os.stat(path)
+    if entry and entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime:
+        return False, entry['sha256']
+    sha256 = file_hash(path)
+    return not entry or entry['sha256'] != sha256, sha256
+
+
+def run_incremental(data_dir=DATA_DIR, output_file=OUTPUT_FILE, product=PRODUCT,
+                    chunk_size=CHUNK_SIZE, workers=1, partition_dir=PARTITION_DIR,
+                    manifest_file=MANIFEST_FILE, full=False):
+    """Reprocess only new or modified shards and refresh output_file
+
+    Each shard owns one partition file. When the only change is new shards
+    sorting after the existing ones, their partitions are appended to the
+    existing output; otherwise the output is reassembled from partition
+    files by byte copy, without parsing any CSV.
+    """
+    shards = find_shards(data_dir)
+    if not shards:
+        raise FileNotFoundError(f"No shards matching {SHARD_PATTERN} in {data_dir}")
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    start = time.perf_counter()
+    manifest = load_manifest(manifest_file)
+    if full or manifest.get('product') != product:
+        manifest = {'shards': {}, 'output': None}
+    os.makedirs(partition_dir, exist_ok=True)
+
+    names = [os.path.basename(path) for path in shards]
+    entries = {}
+    stale = []
+    for path, name in zip(shards, names):
+        entry = manifest['shards'].get(name)
+        if entry and not os.path.exists(os.path.join(partition_dir, name)):
+            entry = None
+        changed, sha256 = shard_changed(path, entry)
+        if changed:
+            stale.append((path, name, sha256))
+        else:
+            entry = dict(entry, mtime=os.stat(path).st_mtime)
+        entries[name] = entry
+
+    shard_stats = process_shards_to_files([path for path, _, _ in stale],
+                                          [os.path.join(partition_dir, name) for _, name, _ in stale],
+                                          product, chunk_size, workers)
+    for (path, name, sha256), (rows_read, rows_written) in zip(stale, shard_stats):
+        stat = os.stat(path)
+        entries[name] = {
+            'size': stat.st_size,
+            'mtime': stat.st_mtime,
+            'sha256': sha256,
+            'rows_read': rows_read,
+            'rows_written': rows_written
+        }
+
+    for name in set(manifest['shards']) - set(names):
+        removed = os.path.join(partition_dir, name)
+        if os.path.exists(removed):
+            os.remove(removed)
+
+    previous = manifest.get('output') or {}
+    previous_names = previous.get('shards', [])
+    stale_names = {name for _, name, _ in stale}
+    can_append = (
+        previous_names == names[:len(previous_names)]
+        and not stale_names & set(previous_names)
+        and os.path.exists(output_file)
+        and os.path.getsize(output_file) == previous.get('size')
+    )
+    # The output is rebuilt, or extended, in a temporary file and renamed
+    # into place, so readers of the live file never see a partial append
+    tmp_file = output_file + '.tmp'
+    if can_append:
+        shutil.copyfile(output_file, tmp_file)
+        with open(tmp_file, 'a', newline='') as writer:
+            append_parts([os.path.join(partition_dir, name) for name in names[len(previous_names):]], writer)
+    else:
+        with open(tmp_file, 'w', newline='') as writer:
+            writer.write(','.join(OUTPUT_COLUMNS) + '\n')
+            append_parts([os.path.join(partition_dir, name) for name in names], writer)
+    os.replace(tmp_file, output_file)
+
+    save_manifest({
+        'product': product,
+        'shards': entries,
+        'output': {'shards': names, 'size': os.path.getsize(output_file)}
+    }, manifest_file)
+    elapsed = time.perf_counter() - start
+
+    rows_read = sum(read for read, _ in shard_stats)
+    return {
+        'shards': len(shards),
+        'processed': len(stale),
+        'appended': can_append,
+        'workers': workers,
+        'rows_read': rows_read,
+        'rows_written': sum(entry['rows_written'] for entry in entries.values()),
+        'seconds': elapsed,
+        'rows_per_sec': rows_read / elapsed if elapsed > 0 else float('inf')
+    }
+
+
+def build_product_store(data_dir=DATA_DIR, store_dir=data_loader.PRODUCT_DIR,
+                        chunk_size=CHUNK_SIZE, products=None):
+    """Split every shard by product into one processed CSV per product
+
+    The raw data is read once, chunk by chunk, whatever the number of
+    products. Each product's rows keep shard order, so its file matches what
+    run_pipeline(product=...) would write. Files are moved into place only
+    once every shard has been read.
+    """
+    shards = find_shards(data_dir)
+    if not shards:
+        raise FileNotFoundError(f"No shards matching {SHARD_PATTERN} in {data_dir}")
+
+    start = time.perf_counter()
+    os.makedirs(store_dir, exist_ok=True)
+    writers = {}
+    rows_read = 0
+    rows_written = {}
+    try:
+        for path in shards:
+            for chunk in pd.read_csv(path, usecols=RAW_COLUMNS, chunksize=chunk_size):
+                rows_read += len(chunk)
+                for product, rows in split_products(chunk, products):
+                    if product not in writers:
+                        writers[product] = open(data_loader.product_path(product, store_dir) + '.tmp',
+                                                'w', newline='')
+                        writers[product].write(','.join(OUTPUT_COLUMNS) + '\n')
+                        rows_written[product] = 0
+                    rows.to_csv(writers[product], header=False, index=False)
+                    rows_written[product] += len(rows)
+    finally:
+        for writer in writers.values():
+            writer.close()
+    for product in writers:
+        path = data_loader.product_path(product, store_dir)
+        os.replace(path + '.tmp', path)
+    elapsed = time.perf_counter() - start
+
+    return {
+        'shards': len(shards),
+        'products': rows_written,
+        'rows_read': rows_read,
+        'seconds': elapsed,
+        'rows_per_sec': rows_read / elapsed if elapsed > 0 else float('inf')
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build processed_transaction_data.csv from raw shards")
+    parser.add_argument('--data-dir', default=DATA_DIR)
+    parser.add_argument('--output', default=OUTPUT_FILE)
+    parser.add_argument('--product', default=PRODUCT)
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Worker processes (default: one per core, 1 disables the pool)")
+    parser.add_argument('--full', action='store_true',
+                        help="Ignore the manifest and reprocess every shard")
+    parser.add_argument('--all-products', action='store_true',
+                        help=f"Also write one processed file per product to {data_loader.PRODUCT_DIR}")
+    args = parser.parse_args(argv)
+
+    print("🛠️ Processing raw sales shards...")
+    stats = run_incremental(args.data_dir, args.output, args.product, args.chunk_size,
+                            workers=args.workers, full=args.full)
+    print(f"✅ {stats['processed']} of {stats['shards']} shards processed on {stats['workers']} workers, "
+          f"{stats['rows_read']:,} rows read, {stats['rows_written']:,} rows written to {args.output}")
+    print(f"⏱️ {stats['seconds']:.2f}s ({stats['rows_per_sec']:,.0f} rows/sec)")
+
+    if data_loader.feather is not None:
+        print(f"📦 Columnar copy written to {data_loader.convert_csv(args.output)}")
+
+    if args.all_products:
+        store = build_product_store(args.data_dir, chunk_size=args.chunk_size)
+        for product, rows in sorted(store['products'].items()):
+            path = data_loader.product_path(product)
+            if data_loader.feather is not None:
+                data_loader.convert_csv(path)
+            print(f"🍬 {product}: {rows:,} rows in {path}")
+        print(f"⏱️ Product store built in {store['seconds']:.2f}s ({store['rows_per_sec']:,.0f} rows/sec)")
+    return stats
+
+
+if __name__ == '__main__':
+    main()
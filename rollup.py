@@ -0,0 +1,90 @@
+"""
+Pre-aggregated daily sales rollup for the Soul Foods dashboards
+
+The rollup maps each region (plus 'all' for every region combined) to its
+daily sales totals, sorted by date. It is built once when the data is
+loaded, so callbacks answer a region switch with a dictionary lookup
+instead of filtering and grouping the raw rows on every click. Rows that
+arrive later are grouped on their own and merged in (merge_rollup).
+
+Raw frames may carry either a datetime 'date' column or the compact int32
+'day' ordinal produced by data_loader.compact_frame; the rollup always
+holds float64 totals against datetime dates.
+"""
+import numpy as np
+import pandas as pd
+
+ALL_REGIONS = 'all'
+
+
+def empty_series():
+    """A daily series with no rows, used for unknown regions"""
+    return pd.DataFrame({'date': pd.Series(dtype='datetime64[ns]'),
+                         'sales': pd.Series(dtype='float64')})
+
+
+def daily_frame(daily):
+    """Turn a Series of totals indexed by date or day ordinal into DataFrame(date, sales)"""
+    dates = daily.index.to_numpy()
+    if daily.index.name == 'day':
+        dates = dates.astype('datetime64[D]')
+    dates = dates.astype('datetime64[ns]')
+    return pd.DataFrame({'date': dates, 'sales': daily.to_numpy(dtype=np.float64)})
+
+
+def build_rollup(df):
+    """Aggregate raw rows into {region: DataFrame(date, sales)} in one grouping pass"""
+    key = 'day' if 'day' in df.columns else 'date'
+    sales = df['sales'].astype(np.float64)
+    by_region = sales.groupby([df['region'], df[key]], observed=True, sort=True).sum()
+    rollup = {
+        str(region): daily_frame(daily.droplevel('region'))
+        for region, daily in by_region.groupby(level='region', observed=True, sort=False)
+    }
+    rollup[ALL_REGIONS] = daily_frame(by_region.groupby(level=key).sum())
+    return rollup
+
+
+def merge_rollup(rollup, update):
+    """Add the daily totals of update to rollup and return the result as a new rollup
+
+    Neither input is modified, so readers of the old rollup are unaffected.
+    Only the regions in update are rebuilt: a series is extended by
+    concatenation when its new days all come after its last day (the
+    common case for a newly landed shard) and re-summed by date otherwise.
+    """
+    merged = dict(rollup)
+    for region, series in update.items():
+        old = rollup.get(region)
+        if not len(series):
+            continue
+        if old is None or not len(old):
+            merged[region] = series
+        elif series['date'].iloc[0] > old['date'].iloc[-1]:
+            merged[region] = pd.concat([old, series], ignore_index=True)
+        else:
+            merged[region] = daily_frame(pd.concat([old, series]).groupby('date', sort=True)['sales'].sum())
+    return merged
+
+
+def lookup(rollup, region):
+    """Return the daily series for a region, or an empty one if it is unknown"""
+    series = rollup.get(region)
+    return series if series is not None else empty_series()
+
+
+def to_payload(rollup, decimals=2):
+    """JSON-ready form of the rollup for the browser
+
+    All regions share the 'all' date axis (ISO strings); a region's missing
+    days are None. A few thousand numbers, small enough to ship once.
+    """
+    axis = rollup[ALL_REGIONS]['date']
+    sales = {}
+    for region, series in rollup.items():
+        values = series.set_index('date')['sales'].reindex(axis).round(decimals)
+        sales[region] = [None if pd.isna(v) else float(v) for v in values]
+    return {
+        'dates': list(np.datetime_as_string(axis.to_numpy(), unit='D')),
+        'sales': sales
+    }
@@ -0,0 +1,201 @@
+"""
+Before/after price-change statistics for every region at once
+
+The daily rollup is laid out as a (regions x days) matrix, so means,
+medians and totals on each side of the event date are single NumPy
+reductions over all regions. Bootstrap confidence intervals are batched
+too: each resample is a row of multinomial day counts, and the resampled
+means for every region come out of one matrix product instead of a Python
+loop.
+
+The results are computed once per dataset (see data_loader.Dataset), so
+the insights callbacks only look them up.
+
+WindowIndex answers arbitrary event-date / window questions (for example
++-90 days around any date) from per-region prefix sums over a dense daily
+axis: after one O(n) pass, every range sum or mean is O(1).
+
+change_sweep repeats the bootstrap over several windows and products. It
+takes seconds rather than milliseconds, so the dashboard runs it as a
+background job (see background_jobs.py).
+"""
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from rollup import ALL_REGIONS
+
+PRICE_INCREASE_DATE = pd.Timestamp('2021-01-15')
+EVENT_WINDOWS = [30, 90, 180]
+N_BOOTSTRAP = 1000
+CONFIDENCE = 0.95
+SEED = 2021
+
+
+def region_matrix(rollup):
+    """Return (regions, dates, values) with values[i, j] the sales of region i on day j (NaN if absent)"""
+    dates = rollup[ALL_REGIONS]['date'].to_numpy()
+    regions = list(rollup)
+    values = np.full((len(regions), len(dates)), np.nan)
+    for i, region in enumerate(regions):
+        series = rollup[region]
+        values[i, np.searchsorted(dates, series['date'].to_numpy())] = series['sales'].to_numpy()
+    return regions, dates, values
+
+
+def bootstrap_means(values, n_boot=N_BOOTSTRAP, rng=None):
+    """Resampled means of each row of values (NaNs ignored), shape (n_boot, rows)
+
+    Every resample draws the days with replacement, shared by all rows,
+    expressed as a row of multinomial counts.
+    """
+    rng = rng if rng is not None else np.random.default_rng(SEED)
+    n = values.shape[1]
+    if n == 0:
+        return np.full((n_boot, values.shape[0]), np.nan)
+    counts = rng.multinomial(n, np.full(n, 1.0 / n), size=n_boot).astype(np.float64)
+    valid = ~np.isnan(values)
+    totals = counts @ np.where(valid, values, 0.0).T
+    days = counts @ valid.T.astype(np.float64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return totals / days
+
+
+def price_change_stats(rollup, event_date=PRICE_INCREASE_DATE, n_boot=N_BOOTSTRAP,
+                       confidence=CONFIDENCE, seed=SEED, days=None):
+    """Before/after statistics for every region in the rollup, as a DataFrame indexed by region
+
+    Columns: before/after mean, median and total daily sales, the change in
+    mean, the percent change, and bootstrap confidence bounds for the
+    before/after means and the percent change. days limits each side to
+    [event - days, event) and [event, event + days), as in
+    WindowIndex.event_window.
+    """
+    regions, dates, values = region_matrix(rollup)
+    event = pd.Timestamp(event_date)
+    split = int(np.searchsorted(dates, np.datetime64(event, 'ns')))
+    lo, hi = 0, len(dates)
+    if days is not None:
+        lo = int(np.searchsorted(dates, np.datetime64(event - pd.Timedelta(days=days), 'ns')))
+        hi = int(np.searchsorted(dates, np.datetime64(event + pd.Timedelta(days=days), 'ns')))
+    before, after = values[:, lo:split], values[:, split:hi]
+
+    # Regions without data on one side get NaN statistics rather than warnings
+    with np.errstate(invalid='ignore', divide='ignore'), warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        stats = pd.DataFrame({
+            'before_mean': np.nanmean(before, axis=1),
+            'after_mean': np.nanmean(after, axis=1),
+            'before_median': np.nanmedian(before, axis=1),
+            'after_median': np.nanmedian(after, axis=1),
+            'before_total': np.nansum(before, axis=1),
+            'after_total': np.nansum(after, axis=1),
+        }, index=pd.Index(regions, name='region'))
+        stats['change'] = stats['after_mean'] - stats['before_mean']
+        stats['change_pct'] = stats['change'] / stats['before_mean'] * 100
+
+        rng = np.random.default_rng(seed)
+        before_boot = bootstrap_means(before, n_boot, rng)
+        after_boot = bootstrap_means(after, n_boot, rng)
+        change_pct_boot = (after_boot - before_boot) / before_boot * 100
+
+        tail = (1 - confidence) / 2 * 100
+        for name, boot in [('before_mean', before_boot), ('after_mean', after_boot),
+                           ('change_pct', change_pct_boot)]:
+            low, high = np.nanpercentile(boot, [tail, 100 - tail], axis=0)
+            stats[f'{name}_low'] = low
+            stats[f'{name}_high'] = high
+    return stats
+
+
+def change_sweep(rollups, region=ALL_REGIONS, event_date=PRICE_INCREASE_DATE, windows=(None, *EVENT_WINDOWS),
+                 n_boot=N_BOOTSTRAP, progress=None):
+    """Bootstrap price-change statistics of one region for every (product, window) pair
+
+    rollups maps a product name to its daily rollup; a window of None is
+    the full history. progress, if given, is called as progress(done, total)
+    after each pair. Returns one row per pair.
+    """
+    total = len(rollups) * len(windows)
+    rows = []
+    done = 0
+    for product, rollup in rollups.items():
+        for days in windows:
+            stats = price_change_stats(rollup, event_date, n_boot, days=days)
+            if region in stats.index:
+                rows.append({'product': product, 'days': days, **stats.loc[region].to_dict()})
+            done += 1
+            if progress is not None:
+                progress(done, total)
+    return pd.DataFrame(rows)
+
+
+class WindowIndex:
+    """Per-region prefix sums of daily sales for O(1) date-range queries
+
+    Days are laid out on a dense daily axis from the first to the last date,
+    so a date maps to its column by subtraction; sums[i, k] holds the total
+    of region i over the first k days and counts[i, k] how many of them had
+    data.
+    """
+
+    def __init__(self, rollup):
+        regions, dates, values = region_matrix(rollup)
+        self.regions = {region: i for i, region in enumerate(regions)}
+        self.first_day = dates[0].astype('datetime64[D]') if len(dates) else np.datetime64(0, 'D')
+        n_days = int((dates[-1].astype('datetime64[D]') - self.first_day).astype(np.int64)) + 1 if len(dates) else 0
+
+        dense = np.full((len(regions), n_days), np.nan)
+        dense[:, (dates.astype('datetime64[D]') - self.first_day).astype(np.int64)] = values
+        valid = ~np.isnan(dense)
+        self.sums = np.zeros((len(regions), n_days + 1))
+        self.sums[:, 1:] = np.cumsum(np.where(valid, dense, 0.0), axis=1)
+        self.counts = np.zeros((len(regions), n_days + 1), dtype=np.int64)
+        self.counts[:, 1:] = np.cumsum(valid, axis=1)
+        self.n_days = n_days
+
+    def offset(self, date):
+        """Column of a date on the dense axis, clamped to [0, n_days]"""
+        if date is None:
+            return None
+        days = (np.datetime64(pd.Timestamp(date), 'D') - self.first_day).astype(np.int64)
+        return int(min(max(days, 0), self.n_days))
+
+    def range_totals(self, start=None, end=None):
+        """(totals, day counts) per region for start <= date < end, as arrays in region order"""
+        lo = 0 if start is None else self.offset(start)
+        hi = self.n_days if end is None else self.offset(end)
+        hi = max(hi, lo)
+        return self.sums[:, hi] - self.sums[:, lo], self.counts[:, hi] - self.counts[:, lo]
+
+    def range_mean(self, region, start=None, end=None):
+        """Mean daily sales of one region for start <= date < end (NaN if no days)"""
+        totals, days = self.range_totals(start, end)
+        i = self.regions[region]
+        return totals[i] / days[i] if days[i] else np.nan
+
+    def event_window(self, event_date=PRICE_INCREASE_DATE, days=None):
+        """Before/after statistics for every region around event_date
+
+        days=None compares the full history on each side; otherwise the
+        before window is [event - days, event) and the after window
+        [event, event + days).
+        """
+        event = pd.Timestamp(event_date)
+        span = None if days is None else pd.Timedelta(days=days)
+        before_total, before_days = self.range_totals(None if span is None else event - span, event)
+        after_total, after_days = self.range_totals(event, None if span is None else event + span)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            stats = pd.DataFrame({
+                'before_mean': before_total / before_days,
+                'after_mean': after_total / after_days,
+                'before_total': before_total,
+                'after_total': after_total,
+                'before_days': before_days,
+                'after_days': after_days,
+            }, index=pd.Index(list(self.regions), name='region'))
+            stats['change'] = stats['after_mean'] - stats['before_mean']
+            stats['change_pct'] = stats['change'] / stats['before_mean'] * 100
+        return stats
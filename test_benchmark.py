@@ -0,0 +1,77 @@
+import json
+
+import pandas as pd
+
+import benchmark
+import data_loader
+
+
+class TestBenchmark:
+    """Test suite for the benchmark data generator and result comparison"""
+
+    def test_parse_scale(self):
+        """Test that scale names map to row counts"""
+        assert benchmark.parse_scale('10k') == 10_000
+        assert benchmark.parse_scale('1m') == 1_000_000
+        assert benchmark.parse_scale('100M') == 100_000_000
+        assert benchmark.parse_scale('2500') == 2_500
+
+    def test_synthetic_data_schema(self):
+        """Test that synthetic data matches the processed dataset schema"""
+        df = benchmark.create_sales_data(10_000)
+
+        assert list(df.columns) == ['sales', 'date', 'region']
+        assert len(df) == 10_000
+        assert df['date'].is_monotonic_increasing
+        assert df['date'].nunique() == benchmark.N_DAYS
+        assert set(df['region']) == set(benchmark.REGIONS)
+        assert (df['sales'] > 0).all()
+        pd.testing.assert_frame_equal(df, benchmark.create_sales_data(10_000))
+
+    def test_streamed_csv_matches_frame(self, tmp_path):
+        """Test that the chunked CSV writer produces the same rows as the frame"""
+        path = benchmark.write_synthetic(str(tmp_path / 'sales.csv'), 2_500, chunk_rows=1_000)
+        expected = benchmark.create_sales_data(2_500, chunk_rows=1_000)
+        loaded = data_loader.read_csv(path)
+
+        assert (loaded['sales'].to_numpy() == expected['sales'].to_numpy()).all()
+        assert (loaded['date'].to_numpy() == expected['date'].to_numpy()).all()
+
+    def test_time_call_loops_fast_functions(self):
+        """Test that sub-millisecond calls are batched within each sample"""
+        timing = benchmark.time_call(lambda: None, repeat=3, min_sample=0.001)
+        assert timing['repeat'] == 3
+        assert timing['number'] > 1
+        assert timing['min'] <= timing['median']
+
+    def test_compare_flags_regressions(self, tmp_path):
+        """Test that slower results beyond the threshold are flagged"""
+        baseline = {'meta': {}, 'results': [
+            {'name': 'csv_load', 'scale': '10k', 'min': 0.010},
+            {'name': 'groupby', 'scale': '10k', 'min': 0.004},
+        ]}
+        current = {'meta': {}, 'results': [
+            {'name': 'csv_load', 'scale': '10k', 'min': 0.011},
+            {'name': 'groupby', 'scale': '10k', 'min': 0.008},
+            {'name': 'update_chart', 'scale': '10k', 'min': 0.012},
+        ]}
+        rows = benchmark.compare(baseline, current, threshold=1.25)
+
+        assert [(row['name'], row['regressed']) for row in rows] == [('csv_load', False), ('groupby', True)]
+
+        path = benchmark.save_results(dict(current, meta={'commit': 'abc1234', 'timestamp': '2024-01-01T00:00:00'}),
+                                      str(tmp_path))
+        assert path.endswith('20240101T000000-abc1234.json')
+        assert json.load(open(path))['results'] == current['results']
+
+    def test_payload_sizes(self):
+        """Test that every JSON path encodes the chart Patch and records its sizes"""
+        timings = dict(benchmark.bench_payload(50, repeat=1))
+
+        assert set(timings) >= {'payload_json', 'payload_typed'}
+        for timing in timings.values():
+            assert timing['min'] > 0
+            assert 0 < timing['gzip_bytes'] < timing['bytes']
+        if 'payload_orjson' in timings:
+            assert timings['payload_orjson']['bytes'] == timings['payload_json']['bytes']
+        assert timings['payload_typed']['bytes'] != timings['payload_json']['bytes']
@@ -0,0 +1,122 @@
+import os
+
+import pytest
+
+from callback_cache import DiskCache, LRUCache, memoize
+
+
+class TestCallbackCache:
+    """Test suite for callback memoization"""
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted first"""
+        cache = LRUCache(maxsize=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        assert cache.get('a') == 1
+        assert cache.get('b') is None
+        assert len(cache) == 2
+
+    def test_memoize_reuses_results(self):
+        """Test that repeat calls are served from the cache"""
+        calls = []
+
+        @memoize(maxsize=8)
+        def callback(region):
+            calls.append(region)
+            return region.upper()
+
+        assert callback('north') == 'NORTH'
+        assert callback('north') == 'NORTH'
+        assert calls == ['north']
+        assert callback.cache.info()['hits'] == 1
+
+    def test_version_change_invalidates(self):
+        """Test that a new data version recomputes results"""
+        state = {'version': 1, 'calls': 0}
+
+        @memoize(version=lambda: state['version'])
+        def callback(region):
+            state['calls'] += 1
+            return state['version']
+
+        assert callback('all') == 1
+        state['version'] = 2
+        assert callback('all') == 2
+        assert state['calls'] == 2
+
+    def test_version_by_argument(self):
+        """Test that a version taking a parameter only invalidates calls with that argument"""
+        versions = {'pink': 1, 'gold': 1}
+        calls = []
+
+        @memoize(version=lambda product='pink': versions[product])
+        def callback(region, product='pink'):
+            calls.append((region, product))
+            return versions[product]
+
+        callback('north')
+        callback('north', 'gold')
+        versions['gold'] = 2
+        assert callback('north') == 1
+        assert callback('north', 'gold') == 2
+        assert calls == [('north', 'pink'), ('north', 'gold'), ('north', 'gold')]
+
+    def test_disk_cache_shared_between_instances(self, tmp_path):
+        """Test that a second process-like instance sees stored results"""
+        writer = DiskCache(str(tmp_path), maxsize=2)
+        reader = DiskCache(str(tmp_path), maxsize=2)
+
+        writer.set(('v1', ('north',)), {'figure': [1, 2, 3]})
+
+        assert reader.get(('v1', ('north',))) == {'figure': [1, 2, 3]}
+        assert reader.get(('v2', ('north',))) is None
+
+    def test_disk_cache_eviction(self, tmp_path):
+        """Test that the disk cache stays within maxsize"""
+        cache = DiskCache(str(tmp_path), maxsize=2)
+        for region in ['north', 'south', 'east']:
+            cache.set(region, region)
+
+        assert len(cache) == 2
+
+    def test_disk_cache_delete_touch_and_lock(self, tmp_path):
+        """Test the diskcache-style calls the background job manager relies on"""
+        cache = DiskCache(str(tmp_path))
+        cache.set('job-progress', ['1', '4'])
+
+        assert cache.touch('job-progress')
+        with cache.transact():
+            assert cache.delete('job-progress')
+        assert not cache.delete('job-progress')
+        assert cache.get('job-progress') is None
+
+    def test_memoize_with_cache_dir(self, tmp_path):
+        """Test that memoize stores figures as plain dicts on disk"""
+        import plotly.graph_objects as go
+
+        @memoize(cache_dir=str(tmp_path))
+        def callback(region):
+            return go.Figure(go.Scatter(x=[1, 2], y=[3, 4])), region
+
+        first = callback('west')
+        second = callback('west')
+
+        assert isinstance(first[0], go.Figure)
+        assert list(second[0]['data'][0]['y']) == [3, 4]
+        assert second[1] == 'west'
+        assert callback.cache.info()['hits'] == 1
+
+    def test_disk_cache_refuses_shared_directory(self, tmp_path):
+        """Test that a cache directory others can write to is refused, and new ones are private"""
+        shared = tmp_path / 'shared'
+        shared.mkdir()
+        os.chmod(shared, 0o777)
+        with pytest.raises(PermissionError):
+            DiskCache(str(shared))
+
+        DiskCache(str(tmp_path / 'private'))
+        assert os.stat(tmp_path / 'private').st_mode & 0o777 == 0o700
@@ -18,6 +18,14 @@ class TestDashAppStructure:
                 'region': ['north', 'south', 'east', 'west'] * 25
             })
             test_data.to_csv('processed_transaction_data.csv', index=False)
+
+    @pytest.fixture(autouse=True)
+    def job_dir(self, monkeypatch, tmp_path):
+        """Keep background jobs out of the user's cache directory"""
+        job_dir = str(tmp_path / 'jobs')
+        monkeypatch.setenv('DASH_JOB_DIR', job_dir)
+        monkeypatch.setattr('background_jobs.JOB_DIR', job_dir)
+        return job_dir
     
     def test_app_imports_successfully(self):
         """Test that the Dash app imports without errors"""
@@ -33,6 +41,296 @@ class TestDashAppStructure:
         except Exception as e:
             pytest.fail(f"App failed to import: {e}")
     
+    def test_import_does_not_load_data(self):
+        """Test that importing the app defers loading until the data is needed"""
+        spec = importlib.util.spec_from_file_location("dash_app", "dash_app.py")
+        dash_app = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(dash_app)
+
+        client = dash_app.app.server.test_client()
+        assert not dash_app.dataset.ready
+        assert client.get('/ready').status_code == 503
+
+        dash_app.dataset.get()
+        assert client.get('/ready').status_code == 200
+        print("✅ Data loads lazily and readiness is reported")
+    
+    def test_zoom_window_parsing(self):
+        """Test that chart zoom events map to the requested date window"""
+        spec = importlib.util.spec_from_file_location("dash_app", "dash_app.py")
+        dash_app = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(dash_app)
+
+        assert dash_app.zoom_window(None) == (None, None)
+        assert dash_app.zoom_window({'xaxis.autorange': True}) == (None, None)
+        assert dash_app.zoom_window({'xaxis.range[0]': '2020-01-01', 'xaxis.range[1]': '2020-02-01'}) == ('2020-01-01', '2020-02-01')
+        assert dash_app.zoom_window({'dragmode': 'pan'}) is None
+        print("✅ Zoom events are parsed into date windows")
+    
+    def test_callback_patches_prebuilt_figure(self):
+        """Test that the chart callback only patches data into the prebuilt figure"""
+        from dash import Patch
+
+        spec = importlib.util.spec_from_file_location("dash_app", "dash_app.py")
+        dash_app = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(dash_app)
+
+        assert len(dash_app.BASE_FIGURE.layout.shapes) == 1, "Price increase marker should be prebuilt"
+        figure, insights = dash_app.update_chart('north')
+        assert isinstance(figure, Patch)
+        assert insights is not None
+        print("✅ Callback returns a partial figure update")
+
+    def test_views_are_cached_per_product(self, tmp_path):
+        """Test that loading another product neither loads the default one nor evicts its views"""
+        from data_loader import ProductCatalog
+        from test_utils import create_test_data
+
+        spec = importlib.util.spec_from_file_location("dash_app", "dash_app.py")
+        dash_app = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(dash_app)
+        (tmp_path / 'products').mkdir()
+        create_test_data().to_csv(tmp_path / 'products' / 'gold_morsel.csv', index=False)
+        dash_app.catalog = ProductCatalog(str(tmp_path / 'products'), use_columnar=False)
+        other = 'gold morsel'
+
+        dash_app.chart_view('north', None, None, None, other)
+        assert not dash_app.catalog.dataset().ready
+
+        dash_app.chart_view('north')
+        dash_app.chart_view('north', None, None, None, other, 'monthly')
+        misses = dash_app.chart_view.cache.info()['misses']
+        dash_app.chart_view('north')
+        assert dash_app.chart_view.cache.info()['misses'] == misses
+        print("✅ Views are cached per product")
+
+    def test_unknown_product_is_ignored(self):
+        """Test that a product name the store does not hold is rejected before any data is touched"""
+        from dash.exceptions import PreventUpdate
+
+        spec = importlib.util.spec_from_file_location("dash_app", "dash_app.py")
+        dash_app = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(dash_app)
+
+        with pytest.raises(PreventUpdate):
+            dash_app.update_chart('north', product='zzz')
+        assert 'zzz' not in dash_app.catalog.datasets()
+        print("✅ Unknown products are ignored")
+
+    def test_unknown_granularity_is_ignored(self):
+        """Test that a granularity the chart does not offer is rejected instead of raising KeyError"""
+        from dash.exceptions import PreventUpdate
+
+        spec = importlib.util.spec_from_file_location("dash_app", "dash_app.py")
+        dash_app = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(dash_app)
+
+        with pytest.raises(PreventUpdate):
+            dash_app.update_chart('north', granularity='hourly')
+        figure, _ = dash_app.update_chart('north', granularity='monthly')
+        assert figure is not None
+        print("✅ Unknown granularities are ignored")
+
+    def test_event_window_controls(self):
+        """Test that the event date and window controls move the marker and insights"""
+        spec = importlib.util.spec_from_file_location("dash_app", "dash_app.py")
+        dash_app = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(dash_app)
+
+        figure, insights = dash_app.update_chart('north', None, '2020-06-01', 90)
+        operations = {tuple(op['location']): op['params'].get('value')
+                      for op in figure.to_plotly_json()['operations']}
+        event_ms = pd.Timestamp('2020-06-01').timestamp() * 1000
+        assert operations[('layout', 'shapes', 0, 'x0')] == event_ms
+        assert operations[('layout', 'annotations', 0, 'x')] == event_ms
+        assert 'Jun 1, 2020 (±90 days)' in str(insights)
+        assert dash_app.event_selection(None, 'full') == ('2021-01-15', None)
+        print("✅ Event controls re-anchor the before/after comparison")
+
+    def test_date_range_control(self):
+        """Test that the date-range picker bounds the chart and a zoom narrows it"""
+        spec = importlib.util.spec_from_file_location("dash_app", "dash_app.py")
+        dash_app = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(dash_app)
+
+        assert "id='date-range'" in open('dash_app.py').read()
+        figure, _ = dash_app.update_chart('north', None, None, 'full', 'pink morsel', '2020-03-01', '2020-03-31')
+        operations = {tuple(op['location']): op['params'].get('value')
+                      for op in figure.to_plotly_json()['operations']}
+        x = operations[('data', 0, 'x')]
+        assert (x[0], x[-1], len(x)) == ('2020-03-01', '2020-03-31', 31)
+        assert operations[('layout', 'xaxis', 'range')] == ['2020-03-01', '2020-03-31']
+
+        assert dash_app.date_window('2020-03-01', '2020-03-31', ('2020-03-10', '2020-04-20')) == ('2020-03-10', '2020-03-31')
+        assert dash_app.date_window('2020-03-01', '2020-03-31', ('2021-01-01', '2021-02-01')) == ('2020-03-01', '2020-03-31')
+        assert dash_app.date_window(None, None, ('2021-01-01', '2021-02-01')) == ('2021-01-01', '2021-02-01')
+        print("✅ Date range control slices the chart")
+
+    def test_granularity_selector(self):
+        """Test that coarser granularities send fewer points from the resample cache"""
+        spec = importlib.util.spec_from_file_location("dash_app", "dash_app.py")
+        dash_app = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(dash_app)
+
+        assert "id='granularity'" in open('dash_app.py').read()
+        points = {}
+        for granularity in ['weekly', 'monthly', 'quarterly']:
+            figure, _ = dash_app.update_chart('south', granularity=granularity)
+            operations = {tuple(op['location']): op['params'].get('value')
+                          for op in figure.to_plotly_json()['operations']}
+            points[granularity] = len(operations[('data', 0, 'x')])
+            assert operations[('layout', 'title', 'text')].endswith(f'({granularity} average)')
+        assert points['weekly'] > points['monthly'] > points['quarterly']
+
+        cached = dash_app.product_data().resampled.region('south')['monthly']
+        assert points['monthly'] == len(cached)
+        print("✅ Granularity selector serves pre-resampled series")
+
+    def test_live_refresh_sends_only_new_points(self, tmp_path):
+        """Test that a new shard reaches the chart as a patch of just the new days"""
+        from dash.exceptions import PreventUpdate
+        from live_refresh import LiveRefresher
+
+        spec = importlib.util.spec_from_file_location("dash_app", "dash_app.py")
+        dash_app = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(dash_app)
+
+        dash_app.live = LiveRefresher(dash_app.catalog, str(tmp_path), known=[], min_interval=0)
+        _, _, state = dash_app.render_chart('north')
+        before = list(dash_app.chart_view('north')['x'])
+        last = pd.Timestamp(dash_app.product_data().rollup['north']['date'].iloc[-1])
+        pd.DataFrame({
+            'product': 'pink morsel', 'price': '$5.00', 'quantity': 100, 'region': 'north',
+            'date': pd.date_range(last + pd.Timedelta(days=1), periods=3).strftime('%Y-%m-%d')
+        }).to_csv(tmp_path / 'daily_sales_data_3.csv', index=False)
+
+        figure, insights, new_state = dash_app.refresh_chart(1, state)
+        operations = figure.to_plotly_json()['operations']
+        deleted = sum(op['location'][2] == 'x' for op in operations if op['operation'] == 'Delete')
+        extended = [op['params']['value'] for op in operations if op['operation'] == 'Extend']
+        assert len(extended[0]) <= 2, "Only the last bucket and any new ones are sent"
+        assert before[:len(before) - deleted] + extended[0] == list(dash_app.chart_view('north')['x'])
+        assert new_state['version'] != state['version']
+        with pytest.raises(PreventUpdate):
+            dash_app.refresh_chart(2, new_state)
+        print("✅ Live refresh patches in only the new points")
+
+    def test_background_analysis(self, job_dir):
+        """Test that the bootstrap sweep runs as a background job with progress and cancellation"""
+        import time
+        import psutil
+
+        spec = importlib.util.spec_from_file_location("dash_app", "dash_app.py")
+        dash_app = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(dash_app)
+        # The job directory is only created once a job is submitted
+        assert not os.path.exists(job_dir)
+
+        client = dash_app.app.server.test_client()
+        payload = {
+            'output': 'analysis-output.children',
+            'outputs': {'id': 'analysis-output', 'property': 'children'},
+            'inputs': [{'id': 'analysis-run', 'property': 'n_clicks', 'value': 1}],
+            'changedPropIds': ['analysis-run.n_clicks'],
+            'state': [{'id': 'analysis-scope', 'property': 'value', 'value': 'product'},
+                      {'id': 'region-filter', 'property': 'value', 'value': 'north'},
+                      {'id': 'event-date', 'property': 'date', 'value': '2021-01-15'},
+                      {'id': 'event-window', 'property': 'value', 'value': 'full'},
+                      {'id': 'product-filter', 'property': 'value', 'value': 'pink morsel'}]
+        }
+        job = client.post('/_dash-update-component', json=payload).get_json()
+        assert job['job'] and job['cacheKey']
+        assert os.path.isdir(job_dir)
+
+        poll = f"/_dash-update-component?cacheKey={job['cacheKey']}&job={job['job']}"
+        deadline = time.time() + 60
+        result = {}
+        progress = None
+        while 'response' not in result and time.time() < deadline:
+            time.sleep(0.1)
+            result = client.post(poll, json=payload).get_json()
+            # Progress entries are removed once read, so the last one may
+            # arrive on any poll before the one carrying the response
+            progress = result.get('progress') or progress
+        assert 'Pink Morsel' in str(result['response']['analysis-output']['children'])
+        assert progress['analysis-progress.max'] == '4'
+
+        payload['state'][0]['value'] = 'all'
+        job = client.post('/_dash-update-component', json=payload).get_json()
+        client.post(f"/_dash-update-component?cancelJob={job['job']}", json={
+            'output': 'analysis-cancel.id',
+            'outputs': {'id': 'analysis-cancel', 'property': 'id'},
+            'inputs': [{'id': 'analysis-cancel', 'property': 'n_clicks', 'value': 1}],
+            'changedPropIds': ['analysis-cancel.n_clicks'],
+            'state': []
+        })
+        assert not psutil.pid_exists(job['job']) or psutil.Process(job['job']).status() == psutil.STATUS_ZOMBIE
+        print("✅ Heavy analyses run as cancellable background jobs")
+
+    def test_metrics_endpoint(self, monkeypatch):
+        """Test that callback phase timings are served as Prometheus text"""
+        monkeypatch.setattr('instrumentation.PROFILE_ENABLED', True)  # as with DASH_PROFILE=1
+        spec = importlib.util.spec_from_file_location("dash_app", "dash_app.py")
+        dash_app = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(dash_app)
+
+        dash_app.update_chart('south')
+        client = dash_app.app.server.test_client()
+        response = client.get('/metrics')
+        assert response.status_code == 200
+        assert response.mimetype == 'text/plain'
+        text = response.get_data(as_text=True)
+        for phase in ['total', 'load', 'view', 'patch', 'insights']:
+            assert f'callback="update_chart",phase="{phase}"' in text
+        assert 'dash_cache_misses_total{cache="chart_view"}' in text
+
+        assert client.get('/debug/profile?seconds=0.05').status_code == 200
+        print("✅ Callback timings are exposed on /metrics")
+
+    def test_responses_are_compressed(self):
+        """Test that the layout and callback responses are gzipped for browsers that accept it"""
+        import gzip
+        import json
+        import loadtest
+
+        spec = importlib.util.spec_from_file_location("dash_app", "dash_app.py")
+        dash_app = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(dash_app)
+
+        import plotly.io.json as plotly_json
+        assert plotly_json.config.default_engine == 'orjson'
+
+        client = dash_app.app.server.test_client()
+        layout = client.get('/_dash-layout', headers={'Accept-Encoding': 'gzip'})
+        assert layout.headers['Content-Encoding'] == 'gzip'
+        assert json.loads(gzip.decompress(layout.data))['type'] == 'Div'
+
+        dependency = loadtest.find_callback(client)
+        payload = loadtest.build_payload(dependency, dash_app.app.layout, 'region-filter', 'north')
+        response = client.post('/_dash-update-component', json=payload, headers={'Accept-Encoding': 'gzip'})
+        assert response.status_code == 200
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert 'sales-chart' in json.loads(gzip.decompress(response.data))['response']
+        print("✅ Layout and callback responses are compressed")
+
+    def test_clientside_mode(self, monkeypatch):
+        """Test that DASH_CLIENTSIDE=1 switches regions with a clientside callback"""
+        monkeypatch.setenv('DASH_CLIENTSIDE', '1')
+        spec = importlib.util.spec_from_file_location("dash_app", "dash_app.py")
+        dash_app = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(dash_app)
+
+        client = dash_app.app.server.test_client()
+        dependencies = client.get('/_dash-dependencies').get_json()
+        clientside = [d for d in dependencies if d.get('clientside_function')]
+        assert len(clientside) == 1
+        assert 'sales-chart.figure' in clientside[0]['output']
+
+        store = dash_app.rollup_store()
+        assert set(store['sales']) == {'all', 'north', 'south', 'east', 'west'}
+        assert store['event'] == '2021-01-15'
+        print("✅ Clientside mode ships the rollup and filters in the browser")
+    
     def test_header_present(self):
         """Test 1: Verify the header is present in app layout"""
         with open('dash_app.py', 'r') as f:
@@ -83,7 +381,21 @@ class TestDashAppStructure:
         assert regions_found >= 4, f"Should have most region options, found {regions_found}"
         
         print("✅ Test 3 PASSED: Region picker is present")
-    
+
+    def test_product_picker_present(self):
+        """Test that the product selector defaults to pink morsel"""
+        spec = importlib.util.spec_from_file_location("dash_app", "dash_app.py")
+        dash_app = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(dash_app)
+
+        assert 'pink morsel' in dash_app.PRODUCTS
+        assert "id='product-filter'" in open('dash_app.py').read()
+        figure, _ = dash_app.update_chart('all', None, None, 'full', 'pink morsel')
+        titles = [op['params']['value'] for op in figure.to_plotly_json()['operations']
+                  if op['location'] == ['layout', 'title', 'text']]
+        assert titles[0].startswith('Pink Morsel Sales Over Time')
+        print("✅ Product picker is present")
+
     def test_data_file_exists(self):
         """Test 4: Verify data file exists and has correct structure"""
         assert os.path.exists('processed_transaction_data.csv'), "Data file should exist"
@@ -0,0 +1,213 @@
+import io
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import data_loader
+from test_utils import create_test_data
+
+
+class TestDataLoader:
+    """Test suite for the shared dashboard data loader"""
+
+    def setup_method(self):
+        self.data = create_test_data()
+        self.data['date'] = self.data['date'].dt.strftime('%Y-%m-%d')
+
+    def write_csv(self, tmp_path):
+        csv_file = str(tmp_path / 'processed.csv')
+        self.data.to_csv(csv_file, index=False)
+        return csv_file
+
+    def write_csv_frame(self):
+        buffer = io.StringIO()
+        self.data.to_csv(buffer, index=False)
+        buffer.seek(0)
+        return buffer
+
+    def test_csv_fallback_types(self, tmp_path):
+        """Test that the CSV path produces typed columns"""
+        df = data_loader.load_sales_data(self.write_csv(tmp_path), use_columnar=False)
+
+        assert pd.api.types.is_datetime64_any_dtype(df['date'])
+        assert isinstance(df['region'].dtype, pd.CategoricalDtype)
+        assert len(df) == len(self.data)
+
+    def test_columnar_matches_csv(self, tmp_path):
+        """Test that the memory-mapped copy loads the same frame as the CSV"""
+        pytest.importorskip('pyarrow')
+        csv_file = self.write_csv(tmp_path)
+
+        df = data_loader.load_sales_data(csv_file)
+
+        assert os.path.exists(data_loader.columnar_path(csv_file))
+        pd.testing.assert_frame_equal(df, data_loader.read_csv(csv_file))
+        assert not list(tmp_path.glob('*.tmp'))
+
+    def test_stale_columnar_copy_is_rebuilt(self, tmp_path):
+        """Test that a CSV changed since its Feather copy was built triggers a rebuild"""
+        pytest.importorskip('pyarrow')
+        csv_file = self.write_csv(tmp_path)
+        data_loader.load_sales_data(csv_file)
+        path = data_loader.columnar_path(csv_file)
+        assert data_loader.columnar_version(path) == data_loader.data_version(csv_file)
+
+        # A newer mtime on the copy does not make it fresh
+        self.data.iloc[:10].to_csv(csv_file, index=False)
+        os.utime(path, (time.time() + 60, time.time() + 60))
+        assert not data_loader.is_fresh(path, csv_file)
+
+        assert len(data_loader.load_sales_data(csv_file)) == 10
+        assert data_loader.is_fresh(path, csv_file)
+
+    def test_compact_frame(self):
+        """Test the compact dtypes and that they are lossless"""
+        df = data_loader.read_csv(self.write_csv_frame())
+        compact = data_loader.compact_frame(df)
+
+        assert compact['sales'].dtype == np.float32
+        assert compact['day'].dtype == np.int32
+        assert isinstance(compact['region'].dtype, pd.CategoricalDtype)
+        assert (data_loader.from_day_ordinal(compact['day']) == df['date'].to_numpy()).all()
+
+        report = data_loader.memory_report(df, compact)
+        assert report['after_bytes'] < report['before_bytes']
+        as_text = df.assign(region=df['region'].astype(object))
+        assert report['before_bytes'] == as_text.memory_usage(index=True, deep=True).sum()
+
+    def test_sales_stay_float64_when_float32_loses_cents(self):
+        """Test that sales are only downcast when every value survives"""
+        sales = pd.Series([0.01, 123456789.99])
+        assert data_loader.compact_sales(sales).dtype == np.float64
+        assert data_loader.compact_sales(pd.Series([3.0, 9.99])).dtype == np.float32
+
+
+class TestLazyDataset:
+    """Test suite for deferred dataset loading"""
+
+    def write_csv(self, tmp_path):
+        csv_file = str(tmp_path / 'processed.csv')
+        create_test_data().to_csv(csv_file, index=False)
+        return csv_file
+
+    def test_nothing_loaded_until_first_use(self, tmp_path):
+        """Test that creating the dataset does not read the file"""
+        dataset = data_loader.LazyDataset(str(tmp_path / 'missing.csv'))
+        assert not dataset.ready
+        assert dataset.status()['ready'] is False
+
+    def test_get_loads_once(self, tmp_path):
+        """Test that get() loads the data and the rollup once"""
+        dataset = data_loader.LazyDataset(self.write_csv(tmp_path), use_columnar=False)
+
+        first = dataset.get()
+        assert dataset.ready
+        assert dataset.get() is first
+        assert set(first.rollup) == {'all', 'north', 'south', 'east', 'west'}
+        assert first.version == data_loader.data_version(dataset.csv_file)
+
+    def test_warm_up_in_background(self, tmp_path):
+        """Test that warm_up() loads the data off the calling thread"""
+        dataset = data_loader.LazyDataset(self.write_csv(tmp_path), use_columnar=False)
+
+        thread = dataset.warm_up()
+        thread.join(timeout=10)
+
+        assert dataset.ready
+        assert dataset.status()['load_seconds'] is not None
+
+    def test_load_error_is_reported(self, tmp_path):
+        """Test that a failed load is surfaced in status()"""
+        dataset = data_loader.LazyDataset(str(tmp_path / 'missing.csv'), use_columnar=False)
+
+        with pytest.raises(FileNotFoundError):
+            dataset.get()
+        assert 'FileNotFoundError' in dataset.status()['error']
+
+    def test_rewritten_csv_is_reloaded(self, tmp_path):
+        """Test that rewriting the CSV reloads the data under a new version"""
+        csv_file = self.write_csv(tmp_path)
+        dataset = data_loader.LazyDataset(csv_file, use_columnar=False)
+        first = dataset.get()
+        assert dataset.get() is first
+
+        create_test_data().iloc[:50].to_csv(csv_file, index=False)
+        second = dataset.get()
+        assert second is not first
+        assert second.version == data_loader.data_version(csv_file) != first.version
+        assert len(second.rollup['all']) == 50
+
+        os.remove(csv_file)
+        assert dataset.get() is second
+
+    def test_extend_folds_in_new_rows(self, tmp_path):
+        """Test that extend() swaps in merged aggregates and tracks what changed"""
+        dataset = data_loader.LazyDataset(self.write_csv(tmp_path), use_columnar=False)
+        before = dataset.get()
+        later = create_test_data()
+        later['date'] = later['date'] + pd.Timedelta(days=100)
+
+        dataset.extend('shard_3.csv', later)
+        after = dataset.get()
+
+        assert after is not before and len(before.rollup['all']) == 100
+        assert len(after.rollup['all']) == 200
+        assert after.version == f"{before.version}+shard_3.csv"
+        assert after.changed_since(before.version) == pd.Timestamp('2020-04-10')
+        assert pd.isna(after.changed_since(after.version))
+        with pytest.raises(KeyError):
+            after.changed_since('unknown')
+
+    def test_extend_before_load(self, tmp_path):
+        """Test that rows folded in before the first load are applied when it loads"""
+        dataset = data_loader.LazyDataset(self.write_csv(tmp_path), use_columnar=False)
+        dataset.extend('shard_3.csv', create_test_data())
+
+        assert np.allclose(dataset.get().rollup['all']['sales'], 2 * create_test_data()['sales'])
+        assert dataset._extra == []
+        dataset.extend('shard_4.csv', create_test_data())
+        assert dataset._extra == []
+
+
+class TestProductCatalog:
+    """Test suite for per-product lazy datasets"""
+
+    def write_store(self, tmp_path):
+        csv_file = str(tmp_path / 'processed.csv')
+        store_dir = tmp_path / 'products'
+        store_dir.mkdir()
+        create_test_data().to_csv(csv_file, index=False)
+        gold = create_test_data()
+        gold['sales'] *= 2
+        gold.to_csv(data_loader.product_path('gold morsel', str(store_dir)), index=False)
+        return data_loader.ProductCatalog(str(store_dir), csv_file=csv_file, use_columnar=False)
+
+    def test_products_listed_from_store(self, tmp_path):
+        """Test that the default product and every partition are offered"""
+        catalog = self.write_store(tmp_path)
+        assert catalog.products() == ['gold morsel', 'pink morsel']
+        assert data_loader.product_slug('Pink Morsel') == 'pink_morsel'
+
+    def test_only_selected_product_is_loaded(self, tmp_path):
+        """Test that loading one product reads only its own partition"""
+        catalog = self.write_store(tmp_path)
+        gold = catalog.dataset('gold morsel').get()
+
+        assert catalog.dataset('gold morsel') is catalog.dataset('gold morsel')
+        assert not catalog.dataset('pink morsel').ready
+        assert [product for product, _ in catalog.version()] == ['gold morsel']
+
+        pink = catalog.dataset().get()
+        assert np.allclose(gold.rollup['all']['sales'], 2 * pink.rollup['all']['sales'])
+
+    def test_unknown_product_is_rejected(self, tmp_path):
+        """Test that a product with no partition never gets a dataset"""
+        catalog = self.write_store(tmp_path)
+
+        assert 'gold morsel' in catalog and 'bogus' not in catalog
+        with pytest.raises(KeyError):
+            catalog.dataset('bogus')
+        assert 'bogus' not in catalog.datasets()
@@ -0,0 +1,127 @@
+import numpy as np
+import pandas as pd
+
+import rollup
+from downsample import RESOLUTIONS, ResampleCache, at_resolution, downsample_series, lttb, resample_mean, window
+from test_utils import create_test_data
+
+
+def make_series(days, step_at=None):
+    dates = pd.date_range('2018-01-01', periods=days, freq='D')
+    sales = 1000 + 50 * np.sin(np.arange(days) / 7)
+    if step_at is not None:
+        sales[dates >= step_at] += 500
+    return pd.DataFrame({'date': dates, 'sales': sales})
+
+
+class TestDownsample:
+    """Test suite for LTTB downsampling of the sales series"""
+
+    def test_lttb_keeps_endpoints(self):
+        """Test that LTTB returns the requested count including both ends"""
+        y = np.random.default_rng(0).normal(size=1000)
+        idx = lttb(np.arange(1000), y, 100)
+
+        assert len(idx) == 100
+        assert idx[0] == 0 and idx[-1] == 999
+        assert np.all(np.diff(idx) > 0)
+
+    def test_lttb_keeps_spike(self):
+        """Test that a single-day spike survives downsampling"""
+        y = np.zeros(1000)
+        y[500] = 100
+        assert 500 in lttb(np.arange(1000), y, 50)
+
+    def test_short_series_unchanged(self):
+        """Test that series under the target are returned as-is"""
+        df = make_series(100)
+        assert downsample_series(df, 500) is df
+
+    def test_bounded_output(self):
+        """Test that the point count stays bounded for long histories"""
+        for days in [2000, 20000, 200000]:
+            assert len(downsample_series(make_series(days), 500)) <= 502
+
+    def test_step_at_breakpoint_preserved(self):
+        """Test that the days either side of the price increase are kept exactly"""
+        step = pd.Timestamp('2021-01-15')
+        df = make_series(5000, step_at=step)
+
+        result = downsample_series(df, 200, breakpoints=[step])
+        before = df[df['date'] < step].iloc[-1]
+        after = df[df['date'] >= step].iloc[0]
+
+        assert before['date'] in set(result['date'])
+        assert after['date'] in set(result['date'])
+
+    def test_window_slice(self):
+        """Test that window() returns the inclusive date range"""
+        df = make_series(100)
+        view = window(df, '2018-01-10', '2018-01-19')
+
+        assert len(view) == 10
+        assert view['date'].iloc[0] == pd.Timestamp('2018-01-10')
+
+    def test_window_is_zero_copy(self):
+        """Test that window() slices the sorted series without copying it"""
+        df = make_series(100)
+        view = window(df, '2018-01-10', None)
+
+        assert len(view) == 91
+        assert np.shares_memory(view['sales'].to_numpy(), df['sales'].to_numpy())
+
+    def test_auto_resolution(self):
+        """Test that long spans go coarse and short windows stay daily"""
+        df = make_series(1500)
+
+        full, full_resolution, _ = at_resolution(df, max_points=500)
+        zoomed, zoomed_resolution, _ = at_resolution(df, 'auto', '2019-01-01', '2019-06-30', max_points=500)
+
+        assert full_resolution == 'weekly'
+        assert len(full) <= 500
+        assert zoomed_resolution == 'daily'
+        assert len(zoomed) == 181
+
+    def test_auto_resolution_bounded_for_long_history(self):
+        """Test that the response size does not grow with the history"""
+        for days in [5000, 50000]:
+            view, _, _ = at_resolution(make_series(days), max_points=300)
+            assert len(view) <= 302
+
+    def test_coarse_buckets_do_not_straddle_breakpoint(self):
+        """Test that weekly averages are split at the price increase"""
+        step = pd.Timestamp('2021-01-15')
+        df = make_series(1500, step_at=step)
+
+        coarse, _, _ = at_resolution(df, max_points=500, breakpoints=[step])
+        before = coarse[coarse['date'] < step]['sales'].max()
+        after = coarse[coarse['date'] >= step]['sales'].min()
+
+        assert after - before > 300
+
+    def test_resample_cache_matches_resample(self):
+        """Test that the one-pass cache gives resample_mean's buckets for every region"""
+        step = pd.Timestamp('2020-02-19')
+        daily = rollup.build_rollup(create_test_data())
+        cache = ResampleCache(daily, [step])
+
+        for region, series in daily.items():
+            for freq, label in RESOLUTIONS[1:]:
+                expected = resample_mean(series, freq, [step])
+                got = cache.region(region)[label]
+                assert (got['date'].to_numpy() == expected['date'].to_numpy()).all()
+                assert np.allclose(got['sales'], expected['sales'])
+        assert cache.region('nowhere') == {}
+
+    def test_fixed_resolution_from_cache(self):
+        """Test that a chosen resolution is sliced from the cache and bounded"""
+        df = make_series(1500)
+        cache = ResampleCache({'all': df})
+
+        monthly, resolution, downsampled = at_resolution(df, 'monthly', '2019-01-01', '2019-12-31', 500,
+                                                         resampled=cache.region('all'))
+        assert (resolution, downsampled, len(monthly)) == ('monthly', False, 12)
+        assert monthly['date'].iloc[0] == pd.Timestamp('2019-01-01')
+
+        daily, _, downsampled = at_resolution(df, 'daily', max_points=500)
+        assert downsampled and len(daily) <= 500
@@ -0,0 +1,116 @@
+import threading
+import time
+
+import pytest
+from dash.exceptions import PreventUpdate
+from flask import Flask
+
+import instrumentation
+
+
+class TestMetrics:
+    """Test suite for callback phase timings and their Prometheus rendering"""
+
+    def setup_method(self):
+        self.metrics = instrumentation.Metrics(enabled=True)
+
+    def test_phases_are_attributed_to_the_running_callback(self):
+        """Test that phases in helpers are recorded under the calling callback"""
+        def helper():
+            with self.metrics.phase('lookup'):
+                pass
+
+        @self.metrics.instrument
+        def update(value):
+            helper()
+            return value
+
+        assert update(3) == 3
+        with self.metrics.phase('outside'):
+            pass
+
+        text = self.metrics.render()
+        assert 'dash_callback_phase_seconds_count{callback="update",phase="lookup"} 1' in text
+        assert 'dash_callback_phase_seconds_count{callback="update",phase="total"} 1' in text
+        assert 'dash_callback_phase_seconds_count{callback="none",phase="outside"} 1' in text
+        assert 'dash_callback_calls_total{callback="update",outcome="ok"} 1' in text
+
+    def test_outcomes(self):
+        """Test that prevented and failed calls are counted separately"""
+        @self.metrics.instrument(name='cb')
+        def callback(action):
+            if action == 'prevent':
+                raise PreventUpdate
+            if action == 'fail':
+                raise ValueError(action)
+
+        with pytest.raises(PreventUpdate):
+            callback('prevent')
+        with pytest.raises(ValueError):
+            callback('fail')
+
+        text = self.metrics.render()
+        assert 'dash_callback_calls_total{callback="cb",outcome="prevented"} 1' in text
+        assert 'dash_callback_calls_total{callback="cb",outcome="error"} 1' in text
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test Prometheus bucket semantics (le is inclusive, +Inf is the count)"""
+        histogram = instrumentation.Histogram(buckets=(0.01, 0.1))
+        for value in [0.005, 0.01, 0.05, 3.0]:
+            histogram.observe(value)
+        assert histogram.cumulative() == [('0.01', 2), ('0.1', 3), ('+Inf', 4)]
+        assert histogram.sum == pytest.approx(3.065)
+
+    def test_disabled_records_nothing(self):
+        """Test that DASH_METRICS=0 style instances are pass-through"""
+        metrics = instrumentation.Metrics(enabled=False)
+        wrapped = metrics.instrument(lambda: 'ok', name='cb')
+        with metrics.phase('p'):
+            assert wrapped() == 'ok'
+        assert 'dash_callback_phase_seconds_count' not in metrics.render()
+
+    def test_dispatch_overhead_recorded_per_request(self):
+        """Test that request time outside the callback is recorded as dispatch"""
+        server = Flask(__name__)
+        self.metrics.instrument_server(server)
+
+        @self.metrics.instrument(name='cb')
+        def callback():
+            return 'ok'
+
+        @server.route(instrumentation.UPDATE_PATH, methods=['POST'])
+        def update():
+            callback()
+            time.sleep(0.002)
+            return 'ok'
+
+        server.test_client().post(instrumentation.UPDATE_PATH)
+        text = self.metrics.render()
+        assert 'dash_callback_phase_seconds_count{callback="cb",phase="dispatch"} 1' in text
+        dispatch = [line for line in text.splitlines()
+                    if line.startswith('dash_callback_phase_seconds_sum{callback="cb",phase="dispatch"}')]
+        assert float(dispatch[0].split()[-1]) >= 0.002
+
+
+class TestSamplingProfiler:
+    """Test suite for the opt-in stack sampler"""
+
+    def test_busy_thread_shows_up(self):
+        """Test that a thread spinning in a function appears in the dump"""
+        stop = threading.Event()
+
+        def spin_in_hot_loop():
+            while not stop.is_set():
+                sum(range(1000))
+
+        thread = threading.Thread(target=spin_in_hot_loop)
+        thread.start()
+        try:
+            dump = instrumentation.SamplingProfiler(interval=0.001).dump(0.1)
+        finally:
+            stop.set()
+            thread.join()
+
+        lines = dump.splitlines()
+        assert any('spin_in_hot_loop' in line for line in lines)
+        assert all(line.rsplit(' ', 1)[1].isdigit() for line in lines)
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+
+import data_loader
+import live_refresh
+from test_utils import create_test_data
+
+
+def raw_shard(path, start, days, products=('pink morsel', 'gold morsel')):
+    """Write a raw shard with one row per product, region and day"""
+    rows = [{'product': product, 'price': '$3.00', 'quantity': 10, 'date': date.strftime('%Y-%m-%d'),
+             'region': region}
+            for date in pd.date_range(start, periods=days)
+            for product in products
+            for region in ['north', 'south', 'east', 'west']]
+    pd.DataFrame(rows).to_csv(path, index=False)
+
+
+class TestLiveRefresher:
+    """Test suite for folding newly landed shards into a running catalog"""
+
+    def make_refresher(self, tmp_path):
+        data_dir = tmp_path / 'data'
+        data_dir.mkdir()
+        raw_shard(data_dir / 'daily_sales_data_0.csv', '2020-01-01', 100)
+        csv_file = str(tmp_path / 'processed.csv')
+        create_test_data().to_csv(csv_file, index=False)
+        (tmp_path / 'products').mkdir()
+        create_test_data().to_csv(tmp_path / 'products' / 'gold_morsel.csv', index=False)
+        catalog = data_loader.ProductCatalog(str(tmp_path / 'products'), csv_file=csv_file, use_columnar=False)
+        refresher = live_refresh.LiveRefresher(catalog, str(data_dir), known=['daily_sales_data_0.csv'],
+                                               min_interval=0)
+        return data_dir, catalog, refresher
+
+    def test_known_shards_are_not_refolded(self, tmp_path):
+        """Test that shards present at startup are treated as already processed"""
+        _, catalog, refresher = self.make_refresher(tmp_path)
+        before = catalog.dataset().get()
+
+        assert refresher.poll() == 0
+        assert catalog.dataset().get() is before
+
+    def test_new_shard_is_folded_in(self, tmp_path):
+        """Test that only a new shard's rows are added to the open product"""
+        data_dir, catalog, refresher = self.make_refresher(tmp_path)
+        before = catalog.dataset().get()
+        raw_shard(data_dir / 'daily_sales_data_1.csv', '2020-04-10', 5)
+
+        assert refresher.poll() == 1
+        after = catalog.dataset().get()
+        assert len(after.rollup['all']) == 105
+        assert np.allclose(after.rollup['all']['sales'].iloc[-5:], 4 * 30.0)
+        assert after.changed_since(before.version) == pd.Timestamp('2020-04-10')
+        assert refresher.poll() == 0
+
+    def test_product_opened_later_catches_up(self, tmp_path):
+        """Test that sync() applies shards that landed before the product was opened"""
+        data_dir, catalog, refresher = self.make_refresher(tmp_path)
+        catalog.dataset().get()
+        raw_shard(data_dir / 'daily_sales_data_1.csv', '2020-04-10', 5)
+        refresher.poll()
+
+        assert not catalog.dataset('gold morsel').ready
+        refresher.sync('gold morsel')
+        refresher.sync('gold morsel')
+        assert refresher.folded == {'pink morsel': 1, 'gold morsel': 1}
+
+    def test_poll_is_rate_limited(self, tmp_path):
+        """Test that poll() scans at most once per min_interval unless forced"""
+        data_dir, catalog, refresher = self.make_refresher(tmp_path)
+        refresher.min_interval = 3600
+        refresher.poll()
+        raw_shard(data_dir / 'daily_sales_data_1.csv', '2020-04-10', 5)
+
+        assert refresher.poll() == 0
+        assert refresher.poll(force=True) == 1
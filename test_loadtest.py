@@ -0,0 +1,55 @@
+import json
+from collections import Counter
+
+import pytest
+
+import loadtest
+
+
+class TestLoadTest:
+    """Test suite for the in-process callback load tester"""
+
+    @pytest.fixture(autouse=True)
+    def job_dir(self, monkeypatch, tmp_path):
+        """Keep background jobs out of the user's cache directory"""
+        monkeypatch.setenv('DASH_JOB_DIR', str(tmp_path / 'jobs'))
+        monkeypatch.setattr('background_jobs.JOB_DIR', str(tmp_path / 'jobs'))
+
+    def test_parse_mix(self):
+        """Test that region weights are parsed, with 1 as the default weight"""
+        assert loadtest.parse_mix('all=2, north=0.5,south') == {'all': 2.0, 'north': 0.5, 'south': 1.0}
+        with pytest.raises(ValueError):
+            loadtest.parse_mix('north=0')
+
+    def test_request_plan_follows_mix(self):
+        """Test that the plan is deterministic and weighted by the mix"""
+        plan = loadtest.request_plan({'all': 3, 'north': 1}, 4000, seed=1)
+        assert plan == loadtest.request_plan({'all': 3, 'north': 1}, 4000, seed=1)
+        counts = Counter(plan)
+        assert 2.5 < counts['all'] / counts['north'] < 3.5
+
+    def test_payload_matches_callback(self):
+        """Test that the built request is accepted by the real callback endpoint"""
+        import dash_app
+
+        client = dash_app.app.server.test_client()
+        dependency = loadtest.find_callback(client)
+        payload = loadtest.build_payload(dependency, dash_app.app.layout, 'region-filter', 'north')
+
+        assert payload['changedPropIds'] == ['region-filter.value']
+        response = client.post(loadtest.ENDPOINT, data=json.dumps(payload), content_type='application/json')
+        assert response.status_code == 200
+        body = response.get_json()['response']
+        assert 'North Region' in json.dumps(body['sales-chart'])
+
+    def test_load_test_reports_percentiles(self):
+        """Test that every worker count gets latency percentiles and throughput"""
+        import dash_app
+
+        summaries = loadtest.load_test(dash_app.app, {'all': 1, 'east': 1}, workers=[1, 2],
+                                       n_requests=20, warmup=2)
+        assert [summary['workers'] for summary in summaries] == [1, 2]
+        for summary in summaries:
+            assert summary['errors'] == 0
+            assert summary['throughput_rps'] > 0
+            assert summary['p50_ms'] <= summary['p95_ms'] <= summary['p99_ms']
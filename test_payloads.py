@@ -0,0 +1,89 @@
+import gzip
+
+from flask import Flask, Response, jsonify
+
+import payloads
+
+
+def make_server(level=payloads.COMPRESS_LEVEL):
+    server = Flask(__name__)
+    calls = []
+
+    @server.route('/data')
+    def data():
+        return jsonify(values=list(range(1000)))
+
+    @server.route('/small')
+    def small():
+        return jsonify(ok=True)
+
+    @server.route('/image')
+    def image():
+        return Response(b'\x89PNG' * 500, mimetype='image/png')
+
+    @server.route(payloads.STATIC_PREFIX + 'bundle.js')
+    def bundle():
+        calls.append('bundle')
+        return Response('var x = 1;\n' * 500, mimetype='text/javascript')
+
+    payloads.compress_responses(server, level)
+    return server, calls
+
+
+class TestPayloads:
+    """Test suite for response encoding and compression"""
+
+    def test_json_responses_are_gzipped(self):
+        """Test that JSON is compressed for clients that accept gzip and left alone otherwise"""
+        server, _ = make_server()
+        client = server.test_client()
+
+        plain = client.get('/data')
+        assert 'Content-Encoding' not in plain.headers
+        assert 'Accept-Encoding' in plain.headers['Vary']
+
+        response = client.get('/data', headers={'Accept-Encoding': 'gzip, deflate'})
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert int(response.headers['Content-Length']) == len(response.data) < len(plain.data)
+        assert gzip.decompress(response.data) == plain.data
+
+        refused = client.get('/data', headers={'Accept-Encoding': 'gzip;q=0'})
+        assert 'Content-Encoding' not in refused.headers
+        print("✅ JSON responses are gzipped when accepted")
+
+    def test_small_and_binary_responses_are_not_compressed(self):
+        """Test that tiny bodies and non-text types are sent as they are"""
+        server, _ = make_server()
+        client = server.test_client()
+
+        for path in ['/small', '/image']:
+            response = client.get(path, headers={'Accept-Encoding': 'gzip'})
+            assert 'Content-Encoding' not in response.headers
+        print("✅ Small and binary responses are left uncompressed")
+
+    def test_static_bundles_are_compressed_once(self):
+        """Test that component bundles reuse their compressed body"""
+        server, calls = make_server()
+        client = server.test_client()
+
+        first = client.get(payloads.STATIC_PREFIX + 'bundle.js', headers={'Accept-Encoding': 'gzip'})
+        second = client.get(payloads.STATIC_PREFIX + 'bundle.js', headers={'Accept-Encoding': 'gzip'})
+        assert calls == ['bundle', 'bundle']
+        assert first.data == second.data
+        assert gzip.decompress(first.data) == b'var x = 1;\n' * 500
+        print("✅ Static bundles are compressed once")
+
+    def test_json_engine(self, monkeypatch, caplog):
+        """Test that orjson is pinned as plotly's engine, with a logged fallback when it is missing"""
+        import plotly.io.json as plotly_json
+
+        monkeypatch.setattr(plotly_json.config, 'default_engine', plotly_json.config.default_engine)
+        assert payloads.use_json_engine('json') == 'json'
+        assert plotly_json.config.default_engine == 'json'
+        assert not caplog.records
+
+        monkeypatch.setattr(payloads, 'orjson', None)
+        assert payloads.use_json_engine('orjson') == 'json'
+        assert plotly_json.config.default_engine == 'json'
+        assert 'orjson is not installed' in caplog.text
+        print("✅ orjson is pinned, and its absence is logged")
@@ -0,0 +1,145 @@
+import pandas as pd
+import pytest
+
+import process_data
+
+
+def write_shard(path, rows):
+    pd.DataFrame(rows, columns=process_data.RAW_COLUMNS).to_csv(path, index=False)
+
+
+class TestProcessData:
+    """Test suite for the raw shard processing pipeline"""
+
+    def setup_method(self):
+        """Raw rows covering several products and price formats"""
+        self.rows = [
+            ['pink morsel', '$3.00', 546, '2018-02-06', 'north'],
+            ['gold morsel', '$9.99', 10, '2018-02-06', 'north'],
+            ['pink morsel', '$3.00', 549, '2018-02-06', 'south'],
+            ['pink morsel', '$5.00', 100, '2021-01-15', 'east'],
+            ['lapis morsel', '$1,000.00', 1, '2021-01-15', 'west'],
+            ['pink morsel', '$1,000.00', 2, '2021-01-16', 'west'],
+        ]
+
+    def test_parse_price(self):
+        """Test that price strings become floats"""
+        prices = pd.Series(['$3.00', '$9.99', '$1,000.00'])
+        assert process_data.parse_price(prices).tolist() == [3.0, 9.99, 1000.0]
+
+    def test_transform_chunk(self):
+        """Test product filtering and the sales column"""
+        chunk = pd.DataFrame(self.rows, columns=process_data.RAW_COLUMNS)
+        result = process_data.transform_chunk(chunk)
+
+        assert list(result.columns) == process_data.OUTPUT_COLUMNS
+        assert result['sales'].tolist() == [1638.0, 1647.0, 500.0, 2000.0]
+        assert result['region'].tolist() == ['north', 'south', 'east', 'west']
+
+    def test_shards_in_numeric_order(self, tmp_path):
+        """Test that shard _10 sorts after shard _2"""
+        for i in [10, 2, 0]:
+            write_shard(tmp_path / f'daily_sales_data_{i}.csv', self.rows)
+        names = [p.rsplit('/', 1)[-1] for p in process_data.find_shards(str(tmp_path))]
+        assert names == ['daily_sales_data_0.csv', 'daily_sales_data_2.csv', 'daily_sales_data_10.csv']
+
+    def test_output_independent_of_chunk_size(self, tmp_path):
+        """Test that chunking does not change the output"""
+        data_dir = tmp_path / 'data'
+        data_dir.mkdir()
+        write_shard(data_dir / 'daily_sales_data_0.csv', self.rows)
+        write_shard(data_dir / 'daily_sales_data_1.csv', self.rows[::-1])
+
+        outputs = []
+        for chunk_size in [1, 4, 1000]:
+            output = tmp_path / f'out_{chunk_size}.csv'
+            stats = process_data.run_pipeline(str(data_dir), str(output), chunk_size=chunk_size)
+            assert stats['rows_read'] == 12
+            assert stats['rows_written'] == 8
+            outputs.append(output.read_bytes())
+
+        assert outputs[0] == outputs[1] == outputs[2]
+        df = pd.read_csv(tmp_path / 'out_1.csv')
+        assert list(df.columns) == ['sales', 'date', 'region']
+
+    def test_missing_shards_raise(self, tmp_path):
+        """Test that an empty data directory is reported"""
+        with pytest.raises(FileNotFoundError):
+            process_data.run_pipeline(str(tmp_path), str(tmp_path / 'out.csv'))
+
+    def test_parallel_matches_single_process(self, tmp_path):
+        """Test that the process pool output is byte-identical to a single-process run"""
+        data_dir = tmp_path / 'data'
+        data_dir.mkdir()
+        for i in range(5):
+            write_shard(data_dir / f'daily_sales_data_{i}.csv', self.rows[i:] + self.rows[:i])
+
+        single = tmp_path / 'single.csv'
+        parallel = tmp_path / 'parallel.csv'
+        process_data.run_pipeline(str(data_dir), str(single), chunk_size=2, workers=1)
+        stats = process_data.run_pipeline(str(data_dir), str(parallel), chunk_size=2, workers=3)
+
+        assert stats['workers'] == 3
+        assert stats['rows_written'] == 20
+        assert single.read_bytes() == parallel.read_bytes()
+
+    def test_incremental_only_processes_changed_shards(self, tmp_path):
+        """Test that reruns parse only new or modified shards"""
+        data_dir = tmp_path / 'data'
+        data_dir.mkdir()
+        output = tmp_path / 'out.csv'
+        options = {
+            'partition_dir': str(tmp_path / 'partitions'),
+            'manifest_file': str(tmp_path / 'manifest.json')
+        }
+        write_shard(data_dir / 'daily_sales_data_0.csv', self.rows)
+        write_shard(data_dir / 'daily_sales_data_1.csv', self.rows)
+
+        stats = process_data.run_incremental(str(data_dir), str(output), **options)
+        assert stats['processed'] == 2
+
+        stats = process_data.run_incremental(str(data_dir), str(output), **options)
+        assert stats['processed'] == 0
+        assert stats['rows_read'] == 0
+
+        # A new shard is appended to the existing output
+        write_shard(data_dir / 'daily_sales_data_2.csv', self.rows[:3])
+        stats = process_data.run_incremental(str(data_dir), str(output), **options)
+        assert stats['processed'] == 1
+        assert stats['appended']
+        assert len(pd.read_csv(output)) == 10
+        assert not list(tmp_path.glob('*.tmp'))
+
+        # A modified shard replaces only its own partition
+        write_shard(data_dir / 'daily_sales_data_0.csv', self.rows[:1])
+        stats = process_data.run_incremental(str(data_dir), str(output), **options)
+        assert stats['processed'] == 1
+        assert not stats['appended']
+
+        full = tmp_path / 'full.csv'
+        process_data.run_pipeline(str(data_dir), str(full))
+        assert output.read_bytes() == full.read_bytes()
+
+        # A deleted shard drops out of the output
+        (data_dir / 'daily_sales_data_1.csv').unlink()
+        stats = process_data.run_incremental(str(data_dir), str(output), **options)
+        assert stats['processed'] == 0
+        assert len(pd.read_csv(output)) == 3
+
+    def test_product_store_matches_single_product_runs(self, tmp_path):
+        """Test that one pass writes the same file per product as a filtered run"""
+        data_dir = tmp_path / 'data'
+        data_dir.mkdir()
+        write_shard(data_dir / 'daily_sales_data_0.csv', self.rows)
+        write_shard(data_dir / 'daily_sales_data_1.csv', self.rows[::-1])
+        store_dir = tmp_path / 'products'
+
+        stats = process_data.build_product_store(str(data_dir), str(store_dir), chunk_size=2)
+        assert stats['rows_read'] == 12
+        assert stats['products'] == {'pink morsel': 8, 'gold morsel': 2, 'lapis morsel': 2}
+
+        for product in stats['products']:
+            single = tmp_path / 'single.csv'
+            process_data.run_pipeline(str(data_dir), str(single), product=product)
+            partition = process_data.data_loader.product_path(product, str(store_dir))
+            assert single.read_bytes() == open(partition, 'rb').read()
@@ -0,0 +1,63 @@
+import pandas as pd
+
+import rollup
+from data_loader import compact_frame
+from test_utils import create_test_data
+
+
+def daily_totals(rows):
+    """Reference daily totals computed directly from raw rows"""
+    expected = rows.groupby('date')['sales'].sum().astype(float).reset_index()
+    expected['date'] = expected['date'].astype('datetime64[ns]')
+    return expected
+
+
+class TestRollup:
+    """Test suite for the precomputed daily/region rollup"""
+
+    def setup_method(self):
+        self.df = create_test_data()
+        self.rollup = rollup.build_rollup(self.df)
+
+    def test_all_regions_total(self):
+        """Test that 'all' matches a direct groupby over every row"""
+        pd.testing.assert_frame_equal(self.rollup['all'], daily_totals(self.df))
+
+    def test_region_totals(self):
+        """Test that each region matches a filtered groupby"""
+        for region in ['north', 'south', 'east', 'west']:
+            region_rows = self.df[self.df['region'] == region]
+            pd.testing.assert_frame_equal(self.rollup[region], daily_totals(region_rows))
+
+    def test_unknown_region_is_empty(self):
+        """Test that an unknown region returns an empty daily series"""
+        series = rollup.lookup(self.rollup, 'nowhere')
+        assert list(series.columns) == ['date', 'sales']
+        assert len(series) == 0
+
+    def test_compact_frame_gives_same_rollup(self):
+        """Test that day ordinals and float32 sales roll up to the same totals"""
+        compact = rollup.build_rollup(compact_frame(self.df))
+        for region, series in self.rollup.items():
+            pd.testing.assert_frame_equal(compact[region], series)
+
+    def test_merge_matches_full_rebuild(self):
+        """Test that merging later rows (appended and overlapping days) equals a rebuild"""
+        later = create_test_data()
+        later['date'] = later['date'] + pd.Timedelta(days=60)
+        merged = rollup.merge_rollup(self.rollup, rollup.build_rollup(later))
+        rebuilt = rollup.build_rollup(pd.concat([self.df, later], ignore_index=True))
+
+        for region, series in rebuilt.items():
+            pd.testing.assert_frame_equal(merged[region], series)
+        assert len(self.rollup['all']) == 100, "The original rollup must not change"
+
+    def test_payload_shares_date_axis(self):
+        """Test the browser payload: one date axis, one sales list per region"""
+        payload = rollup.to_payload(self.rollup)
+
+        assert len(payload['dates']) == len(self.rollup['all'])
+        assert set(payload['sales']) == set(self.rollup)
+        for region, series in self.rollup.items():
+            values = [v for v in payload['sales'][region] if v is not None]
+            assert values == series['sales'].round(2).tolist()
@@ -0,0 +1,130 @@
+import numpy as np
+import pandas as pd
+
+import rollup
+import sales_stats
+
+
+def make_rollup():
+    """Two years of daily sales per region with a step at the event date"""
+    dates = pd.date_range('2020-01-15', '2022-01-14', freq='D')
+    rng = np.random.default_rng(1)
+    rows = []
+    for offset, region in enumerate(['north', 'south', 'east', 'west']):
+        sales = 1000 + 10 * offset + rng.normal(0, 50, len(dates))
+        sales[dates >= sales_stats.PRICE_INCREASE_DATE] += 400
+        rows.append(pd.DataFrame({'date': dates, 'region': region, 'sales': sales}))
+    return rollup.build_rollup(pd.concat(rows, ignore_index=True))
+
+
+class TestSalesStats:
+    """Test suite for the vectorized before/after statistics engine"""
+
+    def setup_method(self):
+        self.rollup = make_rollup()
+        self.stats = sales_stats.price_change_stats(self.rollup)
+
+    def test_matches_filtered_means(self):
+        """Test that every region matches the boolean-filtered computation"""
+        event = sales_stats.PRICE_INCREASE_DATE
+        for region, series in self.rollup.items():
+            before = series[series['date'] < event]['sales']
+            after = series[series['date'] >= event]['sales']
+            row = self.stats.loc[region]
+
+            assert np.isclose(row['before_mean'], before.mean())
+            assert np.isclose(row['after_mean'], after.mean())
+            assert np.isclose(row['before_median'], before.median())
+            assert np.isclose(row['after_total'], after.sum())
+            assert np.isclose(row['change_pct'], (after.mean() - before.mean()) / before.mean() * 100)
+
+    def test_confidence_intervals_bracket_estimates(self):
+        """Test that bootstrap intervals contain the point estimates"""
+        for name in ['before_mean', 'after_mean', 'change_pct']:
+            assert (self.stats[f'{name}_low'] <= self.stats[name]).all()
+            assert (self.stats[name] <= self.stats[f'{name}_high']).all()
+
+    def test_deterministic(self):
+        """Test that every worker computes identical intervals"""
+        again = sales_stats.price_change_stats(self.rollup)
+        pd.testing.assert_frame_equal(self.stats, again)
+
+    def test_region_without_data_after_event(self):
+        """Test that a one-sided region yields NaN rather than an error"""
+        early = {region: series[series['date'] < sales_stats.PRICE_INCREASE_DATE]
+                 for region, series in self.rollup.items()}
+        stats = sales_stats.price_change_stats(early)
+        assert stats['after_mean'].isna().all()
+        assert stats['before_mean'].notna().all()
+
+    def test_bootstrap_means_ignore_missing_days(self):
+        """Test that NaN days are excluded from resampled means"""
+        values = np.array([[1.0, np.nan, 1.0, 1.0], [2.0, 2.0, 2.0, 2.0]])
+        means = sales_stats.bootstrap_means(values, n_boot=50)
+
+        assert means.shape == (50, 2)
+        assert np.allclose(means[~np.isnan(means[:, 0]), 0], 1.0)
+        assert np.allclose(means[:, 1], 2.0)
+
+    def test_window_matches_window_index(self):
+        """Test that days limits the bootstrap statistics to the event window"""
+        stats = sales_stats.price_change_stats(self.rollup, days=90)
+        window = sales_stats.WindowIndex(self.rollup).event_window(days=90)
+
+        assert np.allclose(stats['before_mean'], window['before_mean'])
+        assert np.allclose(stats['after_mean'], window['after_mean'])
+        assert (stats['change_pct_low'] <= stats['change_pct']).all()
+
+    def test_change_sweep_reports_progress(self):
+        """Test that the sweep covers every (product, window) pair and reports each step"""
+        steps = []
+        sweep = sales_stats.change_sweep({'pink': self.rollup, 'gold': self.rollup}, 'north', n_boot=50,
+                                         progress=lambda done, total: steps.append((done, total)))
+
+        assert len(sweep) == 8
+        assert steps[-1] == (8, 8)
+        assert sweep['days'].isna().sum() == 2
+
+
+class TestWindowIndex:
+    """Test suite for prefix-sum event-window queries"""
+
+    def setup_method(self):
+        self.rollup = make_rollup()
+        self.index = sales_stats.WindowIndex(self.rollup)
+
+    def test_full_history_matches_price_change_stats(self):
+        """Test that an unbounded window reproduces the bootstrap engine's means"""
+        stats = sales_stats.price_change_stats(self.rollup, n_boot=10)
+        windows = self.index.event_window()
+        for column in ['before_mean', 'after_mean', 'before_total', 'after_total', 'change_pct']:
+            assert np.allclose(windows[column], stats.loc[windows.index, column])
+
+    def test_windows_match_filtered_means(self):
+        """Test +-N day windows around an arbitrary date against boolean filtering"""
+        event = pd.Timestamp('2021-06-01')
+        for days in sales_stats.EVENT_WINDOWS:
+            stats = self.index.event_window(event, days)
+            for region, series in self.rollup.items():
+                dates = series['date']
+                before = series[(dates >= event - pd.Timedelta(days=days)) & (dates < event)]['sales']
+                after = series[(dates >= event) & (dates < event + pd.Timedelta(days=days))]['sales']
+                assert stats.loc[region, 'before_days'] == days
+                assert np.isclose(stats.loc[region, 'before_mean'], before.mean())
+                assert np.isclose(stats.loc[region, 'after_mean'], after.mean())
+
+    def test_missing_days_are_not_counted(self):
+        """Test that gaps in a region's series do not dilute its mean"""
+        gappy = dict(self.rollup)
+        gappy['north'] = self.rollup['north'].iloc[::2].reset_index(drop=True)
+        index = sales_stats.WindowIndex(gappy)
+        series = gappy['north']
+        expected = series[series['date'] < '2020-03-01']['sales'].mean()
+        assert np.isclose(index.range_mean('north', None, '2020-03-01'), expected)
+
+    def test_range_outside_data_is_clamped(self):
+        """Test that windows past either end are clipped to the data"""
+        stats = self.index.event_window('2019-01-01', 90)
+        assert (stats['before_days'] == 0).all()
+        assert stats['before_mean'].isna().all()
+        assert np.isnan(self.index.range_mean('north', '2030-01-01', '2031-01-01'))
@@ -0,0 +1,21 @@
+"""
+Production WSGI entry point for the Soul Foods dashboard
+
+Run with a pre-forking server, for example:
+    gunicorn -c gunicorn.conf.py wsgi:server
+
+dash_app loads its data lazily, so it is loaded here explicitly. With
+preload_app enabled (see gunicorn.conf.py) that happens once in the master
+process before forking, so workers share the parsed arrays copy-on-write
+instead of each re-reading the data.
+"""
+import gc
+
+from dash_app import app, dataset
+
+server = app.server
+dataset.get()
+
+# Move everything loaded so far out of the garbage collector's generations,
+# so collections in the workers do not touch (and copy) the shared pages.
+gc.freeze()